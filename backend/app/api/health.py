@@ -1,8 +1,9 @@
-from fastapi import APIRouter
-import ollama
-import requests
+from fastapi import APIRouter, Request
+import asyncio
+import httpx
 import psutil
 import logging
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 from app.core.config import settings
@@ -11,16 +12,16 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/health/system")
-async def system_health():
+async def system_health(request: Request):
     """Comprehensive system health check for RTX 3070Ti optimization"""
     
     health_data = {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "system": await _get_system_metrics(),
-        "ollama": await _check_ollama_health(),
+        "ollama": await _check_ollama_health(request.app.state.http),
         "gpu": await _get_gpu_metrics(),
-        "models": await _check_model_availability(),
+        "models": await _check_model_availability(request.app.state.http),
         "memory": await _get_memory_metrics(),
         "optimization": await _get_optimization_status()
     }
@@ -56,7 +57,7 @@ async def system_health():
     return health_data
 
 @router.get("/health/performance")
-async def performance_metrics():
+async def performance_metrics(request: Request):
     """Real-time performance metrics for monitoring"""
     
     return {
@@ -67,21 +68,21 @@ async def performance_metrics():
             "temperature_celsius": await _get_gpu_temperature()
         },
         "system": {
-            "cpu_percent": psutil.cpu_percent(interval=1),
+            "cpu_percent": await asyncio.to_thread(psutil.cpu_percent, interval=1),
             "ram_usage_percent": psutil.virtual_memory().percent,
             "disk_usage_percent": psutil.disk_usage('/').percent
         },
         "ollama": {
-            "response_time_ms": await _measure_ollama_response_time(),
-            "active_models": await _get_active_models()
+            "response_time_ms": await _measure_ollama_response_time(request.app.state.http),
+            "active_models": await _get_active_models(request.app.state.http)
         }
     }
 
 @router.get("/health/recommendations")
-async def optimization_recommendations():
+async def optimization_recommendations(request: Request):
     """Get optimization recommendations based on current system state"""
     
-    health = await system_health()
+    health = await system_health(request)
     recommendations = []
     
     # GPU optimizations
@@ -154,18 +155,18 @@ async def _get_system_metrics() -> Dict[str, Any]:
     try:
         return {
             "cpu_count": psutil.cpu_count(),
-            "cpu_usage_percent": psutil.cpu_percent(interval=1),
+            # Samples for 1 s: off the event loop so other requests keep being served
+            "cpu_usage_percent": await asyncio.to_thread(psutil.cpu_percent, interval=1),
             "boot_time": datetime.fromtimestamp(psutil.boot_time()).isoformat()
         }
     except Exception as e:
         logger.error(f"Failed to get system metrics: {e}")
         return {"error": str(e)}
 
-async def _check_ollama_health() -> Dict[str, Any]:
+async def _check_ollama_health(http: httpx.AsyncClient) -> Dict[str, Any]:
     """Check Ollama service health"""
     try:
-        client = ollama.Client(host=settings.OLLAMA_URL)
-        response = requests.get(f"{settings.OLLAMA_URL}/api/tags", timeout=5)
+        response = await http.get(f"{settings.OLLAMA_URL}/api/tags")
         if response.status_code == 200:
             models = response.json().get('models', [])
             return {
@@ -221,10 +222,10 @@ async def _get_gpu_metrics() -> Dict[str, Any]:
             "error": str(e)
         }
 
-async def _check_model_availability() -> Dict[str, Any]:
+async def _check_model_availability(http: httpx.AsyncClient) -> Dict[str, Any]:
     """Check which models are available in Ollama"""
     try:
-        response = requests.get(f"{settings.OLLAMA_URL}/api/tags", timeout=5)
+        response = await http.get(f"{settings.OLLAMA_URL}/api/tags")
         if response.status_code == 200:
             models_data = response.json().get('models', [])
             available_models = [model['name'] for model in models_data]
@@ -306,23 +307,22 @@ async def _get_gpu_temperature() -> Optional[float]:
     except:
         return None
 
-async def _measure_ollama_response_time() -> Optional[float]:
+async def _measure_ollama_response_time(http: httpx.AsyncClient) -> Optional[float]:
     """Measure Ollama API response time"""
     try:
-        import time
-        start = time.time()
-        response = requests.get(f"{settings.OLLAMA_URL}/api/tags", timeout=5)
-        end = time.time()
+        start = time.perf_counter()
+        response = await http.get(f"{settings.OLLAMA_URL}/api/tags")
+        elapsed = time.perf_counter() - start
         if response.status_code == 200:
-            return round((end - start) * 1000, 2)  # Convert to ms
+            return round(elapsed * 1000, 2)  # Convert to ms
         return None
     except:
         return None
 
-async def _get_active_models() -> int:
+async def _get_active_models(http: httpx.AsyncClient) -> int:
     """Get number of currently loaded models"""
     try:
-        response = requests.get(f"{settings.OLLAMA_URL}/api/ps", timeout=5)
+        response = await http.get(f"{settings.OLLAMA_URL}/api/ps")
         if response.status_code == 200:
             models = response.json().get('models', [])
             return len(models)
@@ -4,10 +4,11 @@ from pydantic import BaseModel, Field
 from typing import Optional, AsyncGenerator, Dict, Any
 import uuid
 import asyncio
-import json
+import orjson
 import os
 from datetime import datetime
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from app.core.story_generator import StoryGenerator
 from app.core.config import settings
@@ -101,6 +102,7 @@ async def generate_story(request: EnhancedStoryRequest, background_tasks: Backgr
         "current_step_number": 0,
         "total_steps": 8,
         "created_at": datetime.now().isoformat(),
+        "created_perf": time.perf_counter(),  # monotonic origin for elapsed/ETA
         "request": request.dict(),
         "generation_params": generation_params,
         "enhanced_features": {
@@ -113,6 +115,8 @@ async def generate_story(request: EnhancedStoryRequest, background_tasks: Backgr
         },
         # Micro progress
         "beat": {"index": 0, "total": 0, "stage": "init", "stage_progress": 0},
+        # Draft beat texts as they finish, streamed to clients as story_delta
+        "partial_beats": [],
         "models": {
             "generator": models_dict.get("generator") if models_dict else settings.DEFAULT_MODELS["generator"],
             "reasoner": models_dict.get("reasoner") if models_dict else settings.DEFAULT_MODELS["reasoner"],
@@ -154,11 +158,11 @@ async def stream_job_progress(job_id: str):
 
     async def event_stream() -> AsyncGenerator[str, None]:
         last_snapshot = None
-        start = datetime.now()
+        sent_beats = 0
 
         def snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
             # compute elapsed
-            elapsed = (datetime.now() - datetime.fromisoformat(job["created_at"])).total_seconds()
+            elapsed = time.perf_counter() - job["created_perf"]
             job["timing"]["elapsed_sec"] = elapsed
 
             # rough ETA if beats known
@@ -192,9 +196,22 @@ async def stream_job_progress(job_id: str):
             job = jobs[job_id]
             data = snapshot(job)
 
-            if data != last_snapshot:
-                yield f"data: {json.dumps(data)}\n\n"
+            if data["status"] == "completed" and "result" in job:
+                # Ship the result with the terminal event so clients skip GET /result
+                data["result"] = _result_payload(job_id, job)
+
+            # Draft beats this client hasn't seen yet; the final result supersedes them
+            delta = None
+            partial = job.get("partial_beats", ())
+            if len(partial) > sent_beats and data["status"] != "completed":
+                delta = "\n\n".join(partial[sent_beats:])
+                sent_beats = len(partial)
+
+            if data != last_snapshot or delta:
                 last_snapshot = data
+                if delta:
+                    data = {**data, "story_delta": delta}
+                yield f"data: {orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()}\n\n"
 
             if job["status"] in ["completed", "failed"]:
                 break
@@ -245,6 +262,10 @@ async def get_job_result(job_id: str):
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Job not completed yet")
 
+    return _result_payload(job_id, job)
+
+def _result_payload(job_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Body of GET /generate/{job_id}/result; also sent on the final SSE event."""
     result = job.get("result", {})
     enhanced_result = {
         "job_id": job_id,
@@ -335,19 +356,8 @@ async def health_check_enhanced():
         "ollama_url": settings.OLLAMA_URL
     }
 
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
-import threading
-
-# Thread pool globale
-# routes.py — ripristino generazione reale con orchestrator, senza cambiare le API
-
-from concurrent.futures import ThreadPoolExecutor
-import asyncio
-import os, json
-from datetime import datetime
-import logging
-logger = logging.getLogger(__name__)
+# Output JSON files: 2-space indent like json.dump(indent=2), UTF-8 text instead of \u escapes
+_JSON_FILE_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
 
 # Thread pool unico per la generazione (evita conflitti GPU e conserva memoria)
 _executor = ThreadPoolExecutor(max_workers=1)
@@ -432,8 +442,23 @@ async def enhanced_story_generation_pipeline(job_id: str, req: EnhancedStoryRequ
                     emit(jobs[job_id]["progress"], jobs[job_id]["current_step"],
                          jobs[job_id]["current_step_number"],
                          stage_metrics={"beat": {"index": beat_idx + 1, "total": total_beats, "stage": stage, "stage_progress": 100}})
+                # Streamed chunks are ~tokens; ~1.4 tokens per word gives a rough in-stage percentage
+                expected_chunks = max(1, int(params.get("words_per_beat", settings.WORDS_PER_BEAT) * 1.4))
+                async def on_stage_progress(beat_idx: int, total_beats: int, stage: str, chunks: int):
+                    emit(jobs[job_id]["progress"], jobs[job_id]["current_step"],
+                         jobs[job_id]["current_step_number"],
+                         stage_metrics={"beat": {"index": beat_idx + 1, "total": total_beats, "stage": stage,
+                                                 "stage_progress": min(99, chunks * 100 // expected_chunks)}})
+                def on_beat_complete(beat_idx: int, beat: Dict[str, Any]):
+                    text = beat.get("text", "").strip()
+                    if text and job_id in jobs:
+                        jobs[job_id]["partial_beats"].append(text)
+                        if job_id in job_events:
+                            loop.call_soon_threadsafe(asyncio.create_task, _set_event_threadsafe(loop, job_events[job_id]))
                 orch.on_stage_start = on_stage_start
                 orch.on_stage_end = on_stage_end
+                orch.on_stage_progress = on_stage_progress
+                orch.on_beat_complete = on_beat_complete
 
             # Esegui la generazione async nel loop del thread (senza bloccare l'event loop principale)
             t_loop = asyncio.new_event_loop()
@@ -452,6 +477,7 @@ async def enhanced_story_generation_pipeline(job_id: str, req: EnhancedStoryRequ
                     )
                 )
             finally:
+                t_loop.run_until_complete(gen.aclose())
                 t_loop.close()
 
             # Persistenza file output (reale)
@@ -464,22 +490,21 @@ async def enhanced_story_generation_pipeline(job_id: str, req: EnhancedStoryRequ
 
             if result.get("beats_schema"):
                 schema_path = os.path.join(output_dir, "beats_schema.json")
-                with open(schema_path, "w", encoding="utf-8") as f:
-                    json.dump(result["beats_schema"], f, indent=2)
+                with open(schema_path, "wb") as f:
+                    f.write(orjson.dumps(result["beats_schema"], option=_JSON_FILE_OPTS))
 
             if result.get("metrics"):
                 metrics_path = os.path.join(output_dir, "generation_metrics.json")
-                with open(metrics_path, "w", encoding="utf-8") as f:
-                    json.dump({
+                with open(metrics_path, "wb") as f:
+                    f.write(orjson.dumps({
                         "metrics": result["metrics"],
                         "coherence_stats": result.get("coherence_stats", {}),
                         "memory_stats": result.get("memory_stats", {}),
                         "generation_params": params
-                    }, f, indent=2)
+                    }, option=_JSON_FILE_OPTS))
 
             # Completa job
             if job_id in jobs:
-                jobs[job_id]["status"] = "completed"
                 jobs[job_id]["progress"] = 100
                 jobs[job_id]["current_step"] = "✅ Enhanced generation complete with parameter compliance!"
                 jobs[job_id]["current_step_number"] = 8
@@ -489,13 +514,15 @@ async def enhanced_story_generation_pipeline(job_id: str, req: EnhancedStoryRequ
                 # Update final quality metrics
                 coherence_stats = result.get("coherence_stats", {})
                 jobs[job_id]["quality"]["parameter_compliance"] = coherence_stats.get("parameter_compliance_avg", 0.0)
+                # Flipped last: streams that see "completed" must also see the result
+                jobs[job_id]["status"] = "completed"
                 
                 if job_id in job_events:
                     loop.call_soon_threadsafe(asyncio.create_task, _set_event_threadsafe(loop, job_events[job_id]))
             return True
 
         except Exception as e:
-            logger.exception(f"Generation failed (job_id={job_id}): {e}")
+            logger.exception("Generation failed (job_id=%s): %s", job_id, e)
             if job_id in jobs:
                 jobs[job_id]["status"] = "failed"
                 jobs[job_id]["error"] = str(e)
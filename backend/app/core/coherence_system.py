@@ -1,10 +1,8 @@
-import ollama
 import numpy as np
 import re
 from typing import Dict, List, Set, Optional, Tuple
 from collections import defaultdict, deque
 import logging
-from app.core.config import settings
 from app.core.embodiment_destination_validators import EmbodimentValidator, DestinationValidator
 
 logger = logging.getLogger(__name__)
@@ -13,7 +11,6 @@ class CoherenceSystem:
     """Advanced coherence system with embodiment & destination scoring"""
     
     def __init__(self):
-        self.client = ollama.Client(host=settings.OLLAMA_URL)
         self.character_tracker: Dict[str, dict] = defaultdict(dict)
         self.location_tracker: Dict[str, dict] = defaultdict(dict)
         self.object_tracker: Dict[str, dict] = defaultdict(dict)
@@ -153,10 +150,11 @@ class CoherenceSystem:
     
     # NEW: Embodiment & Destination stats directly
     def compute_embodiment_destination_stats(self, beats: List[Dict[str, str]]) -> Dict[str, any]:
-        scores = [self._embodiment_validator.validate_beat(b.get('text',''))['score'] for b in beats]
-        dest = self._destination_validator.validate_destination_arc(beats)
+        texts = [b.get('text','') for b in beats]
+        scores = self._embodiment_validator.validate_batch(texts)
+        dest = self._destination_validator.validate_destination_arc(beats, texts=texts)
         return {
-            'embodiment_score_avg': (sum(scores)/max(1,len(scores))) if scores else 0.0,
+            'embodiment_score_avg': (sum(scores)/len(scores)) if scores else 0.0,
             'destination_completion': bool(dest.get('ok', False)),
             'destination_missing': dest.get('missing', [])
         }
@@ -4,6 +4,10 @@ import os
 class Settings:
     # Basic settings
     OLLAMA_URL: str = os.getenv("OLLAMA_URL", "http://ollama:11434")
+    OLLAMA_MAX_CONNECTIONS: int = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "16"))
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OLLAMA_MAX_KEEPALIVE_CONNECTIONS", "8"))
+    OLLAMA_KEEPALIVE_EXPIRY: float = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))  # seconds an idle connection stays pooled
+    OLLAMA_NUM_PARALLEL: int = int(os.getenv("OLLAMA_NUM_PARALLEL", "2"))  # concurrent requests the server serves; caps fan-out
     MODEL_NAME: str = os.getenv("MODEL_NAME", "qwen3:8b")  # default generator
 
     # Data paths
@@ -20,6 +24,18 @@ class Settings:
     MAX_TOKENS_BEAT: int = int(os.getenv("MAX_TOKENS_BEAT", "800"))
     MAX_TOKENS_OUTLINE: int = int(os.getenv("MAX_TOKENS_OUTLINE", "1500"))
 
+    # Theme/outline semantic cache
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "256"))
+    SEMANTIC_CACHE_PATH: str = os.getenv("SEMANTIC_CACHE_PATH", "/app/data/cache/theme_outline_cache.sqlite3")  # empty = memory only
+
+    # Translation: context window (tokens) MODEL_NAME is served with; sizes the chunks
+    TRANSLATION_NUM_CTX: int = int(os.getenv("TRANSLATION_NUM_CTX", "2048"))
+    # Translated chunk cache
+    TRANSLATION_CACHE_MAX_ENTRIES: int = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "2048"))
+    TRANSLATION_CACHE_PATH: str = os.getenv("TRANSLATION_CACHE_PATH", "/app/data/cache/translation_cache.json")  # empty = memory only
+
     # Model defaults (fixed)
     DEFAULT_MODELS = {
         "generator": "qwen3:8b",
@@ -127,6 +143,7 @@ class Settings:
     TRANSITION_TOKENS = [
         "più avanti", "oltre il", "svolti", "superi", "raggiungi", "scendi", "risali", "appena dopo", "di fronte", "poco più in là"
     ]
+    DEFAULT_WAYPOINTS = ["entry path", "gentle bend", "small clearing", "wooden bridge", "soft moss hollow"]
 
     # Destination Architecture
     DESTINATION_PROMISE_BEAT: int = int(os.getenv("DESTINATION_PROMISE_BEAT", "1"))
@@ -3,7 +3,7 @@ from .config import settings
 
 # New validators for embodiment and destination arcs
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 MOVEMENT_VERBS = [
     "incammin", "avanz", "attravers", "super", "raggiung", "scend", "risal", "volt", "prosegu", "sost"
@@ -17,17 +17,44 @@ SENSORY_LEXICON = {
     "ambientale": ["luce", "suono", "fruscio", "profumo", "odore", "aria", "erba", "acqua", "foglia"]
 }
 
+DOWNSHIFT_TOKENS = ["respiro", "rilassa", "si allunga", "si scioglie", "più lento"]
+
+def _contains_any(t: str, tokens) -> bool:
+    for tok in tokens:
+        if tok in t:
+            return True
+    return False
+
+def _embodiment_flags(t: str) -> Tuple[bool, bool, bool, bool, bool]:
+    """(movement, transition, sensory_coupling, downshift, second_person) for a lowercased beat.
+
+    Plain substring tests on purpose: for vocabularies this small CPython's
+    `in` fast-search is quicker than regex alternations or token-id scans.
+    """
+    return (
+        _contains_any(t, MOVEMENT_VERBS),
+        _contains_any(t, TRANSITION_TOKENS),
+        _contains_any(t, SENSORY_LEXICON["corporeo"]) and _contains_any(t, SENSORY_LEXICON["ambientale"]),
+        _contains_any(t, DOWNSHIFT_TOKENS),
+        (" ti " in f" {t} ") or t.strip().startswith("ti ") or (" i tuoi" in t)
+    )
+
 class EmbodimentValidator:
+    def validate_batch(self, texts: List[str]) -> List[int]:
+        """Embodiment scores for many beats at once, aligned with texts."""
+        return [sum(_embodiment_flags(t.lower())) for t in texts]
+
+    def validate_beats(self, texts: List[str]) -> List[Dict]:
+        """validate_beat for many beats at once, aligned with texts."""
+        return [self._result(_embodiment_flags(t.lower())) for t in texts]
+
     def validate_beat(self, text: str) -> Dict:
-        t = text.lower()
-        has_movement = any(v in t for v in MOVEMENT_VERBS)
-        has_transition = any(tok in t for tok in TRANSITION_TOKENS)
-        has_corp = any(w in t for w in SENSORY_LEXICON["corporeo"])
-        has_env = any(w in t for w in SENSORY_LEXICON["ambientale"])
-        has_sensory_coupling = has_corp and has_env
-        has_downshift = any(k in t for k in ["respiro", "rilassa", "si allunga", "si scioglie", "più lento"]) 
-        second_person = (" ti " in f" {t} ") or t.strip().startswith("ti ") or (" i tuoi" in t)
-        score = sum([has_movement, has_transition, has_sensory_coupling, has_downshift, second_person])
+        return self._result(_embodiment_flags(text.lower()))
+
+    @staticmethod
+    def _result(flags: Tuple[bool, bool, bool, bool, bool]) -> Dict:
+        has_movement, has_transition, has_sensory_coupling, has_downshift, second_person = flags
+        score = sum(flags)
         return {
             "ok": score >= 4,
             "score": score,
@@ -41,24 +68,24 @@ class EmbodimentValidator:
         }
 
 class DestinationValidator:
-    ARRIVAL_TOKENS = ["hai raggiunto", "sei arrivato", "arrivi", "raggiungi", "giungi"]
-    PROGRESS_TOKENS = ["più vicino", "più avanti", "verso", "in lontan", "si avvicina", "approssimi", "ti avvicini"]
-    PROMISE_TOKENS = ["stanotte", "questa notte", "questa sera", "questa camminata", "questa passeggiata"]
+    ARRIVAL_TOKENS = ("hai raggiunto", "sei arrivato", "arrivi", "raggiungi", "giungi")
+    PROGRESS_TOKENS = ("più vicino", "più avanti", "verso", "in lontan", "si avvicina", "approssimi", "ti avvicini")
+    PROMISE_TOKENS = ("stanotte", "questa notte", "questa sera", "questa camminata", "questa passeggiata")
+    GOAL_TOKENS = ("verso", "raggiungere", "meta", "destinazione")
 
     def _detect_destination_promise(self, text: str) -> bool:
         t = text.lower()
-        return any(tok in t for tok in self.PROMISE_TOKENS) and any(tok in t for tok in ["verso", "raggiungere", "meta", "destinazione"])    
+        return _contains_any(t, self.PROMISE_TOKENS) and _contains_any(t, self.GOAL_TOKENS)
 
     def _detect_progress_markers(self, text: str) -> bool:
-        t = text.lower()
-        return any(tok in t for tok in self.PROGRESS_TOKENS)
+        return _contains_any(text.lower(), self.PROGRESS_TOKENS)
 
     def _detect_arrival_language(self, text: str) -> bool:
-        t = text.lower()
-        return any(tok in t for tok in self.ARRIVAL_TOKENS)
+        return _contains_any(text.lower(), self.ARRIVAL_TOKENS)
 
-    def validate_destination_arc(self, beats: List[Dict]) -> Dict:
-        texts = [b.get("text", "") for b in beats]
+    def validate_destination_arc(self, beats: List[Dict], texts: Optional[List[str]] = None) -> Dict:
+        if texts is None:
+            texts = [b.get("text", "") for b in beats]
         has_setup = any(self._detect_destination_promise(x) for x in texts[:2]) if len(texts) >= 2 else False
         has_progress = any(self._detect_progress_markers(x) for x in texts[2:-2]) if len(texts) > 4 else False
         has_arrival = any(self._detect_arrival_language(x) for x in texts[-3:]) if len(texts) >= 1 else False
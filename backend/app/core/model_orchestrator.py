@@ -1,17 +1,14 @@
-import ollama
-import time
-import json
 import asyncio
-from typing import Dict, Optional, List, Tuple, Any
+from typing import Awaitable, Callable, Dict, Optional, List, Any, Tuple
 from app.core.config import settings
+from app.core.ollama_client import new_async_client
 import logging
 import re
-from datetime import datetime
 
 from app.core.prompts import (
-    BEAT_GENERATION_PROMPT, 
-    REASONER_EMBODIMENT_CHECKLIST, 
-    REASONER_DESTINATION_CHECKLIST,
+    render_beat_generation_prompt,
+    render_reasoner_embodiment_checklist,
+    render_reasoner_destination_checklist,
     format_generation_parameters,
     format_style_requirements,
     format_action_style,
@@ -22,6 +19,17 @@ from app.core.prompts import (
 
 logger = logging.getLogger(__name__)
 
+# Compiled once; _validate_beat_parameters runs for every beat
+_FIRST_PERSON_RE = re.compile(r'\b(i|me|my|mine|myself)\b')
+_THIRD_PERSON_RE = re.compile(r'\b(he|she|they|him|her|them)\b')
+# No sensory word is a prefix of another, so one alternation counts the same as per-word scans
+_SENSORY_WORDS_RE = re.compile(r'\b(?:see|hear|feel|touch|smell|taste|sense|notice|perceive)')
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+_TRANSITION_TOKENS_LOWER = tuple(t.lower() for t in settings.TRANSITION_TOKENS)
+_DOWNSHIFT_WORDS = ('breath', 'relax', 'ease', 'slow', 'settle', 'calm', 'gentle')
+# Streamed chunks between on_stage_progress calls (one chunk is roughly one token)
+_PROGRESS_EVERY_CHUNKS = 32
+
 class EnhancedModelOrchestrator:
     """Enhanced Sequential Multi-Model Orchestration with full parameter support."""
 
@@ -42,8 +50,17 @@ class EnhancedModelOrchestrator:
         self.tts_markers = tts_markers
         self.strict_schema = strict_schema
         self.generation_params = generation_params or {}
-        
-        self.client = ollama.Client(host=settings.OLLAMA_URL)
+        # Optional hook called as on_beat_complete(beat_idx, beat_result) after each beat
+        self.on_beat_complete: Optional[Callable[[int, Dict[str, Any]], None]] = None
+        # Optional async hooks around each model stage of a beat:
+        # on_stage_start(beat_idx, total_beats, stage), on_stage_end(beat_idx, total_beats, stage, words)
+        # and on_stage_progress(beat_idx, total_beats, stage, chunks_streamed) while a response streams
+        self.on_stage_start: Optional[Callable[[int, int, str], Awaitable[None]]] = None
+        self.on_stage_end: Optional[Callable[[int, int, str, int], Awaitable[None]]] = None
+        self.on_stage_progress: Optional[Callable[[int, int, str, int], Awaitable[None]]] = None
+        self._beats_target = 0
+        
+        self.aclient, self._transport = new_async_client()
         self.current_sensory_index = 0
         self.opener_usage = {}
         self.dynamic_blacklist = set()
@@ -56,12 +73,18 @@ class EnhancedModelOrchestrator:
             "parameter_compliance_score": 0.0
         }
         
-        logger.info(f"EnhancedModelOrchestrator initialized with params: {self.generation_params}")
+        logger.info("EnhancedModelOrchestrator initialized with params: %s", self.generation_params)
     
+    async def aclose(self) -> None:
+        """Close the pooled Ollama connections; call on the loop that used them."""
+        await self._transport.aclose()
+
     async def generate_enhanced_story(self, prompt: str, beats_target: int, setting: Dict, options: Optional[Dict] = None) -> Dict[str, Any]:
         waypoints = self._extract_waypoints_from_setting(setting)
         destination_ctx = (setting or {}).get("destination", {})
         generation_params = (setting or {}).get("generation_params", self.generation_params)
+        prompt_sections = self._beat_prompt_sections(generation_params)
+        self._beats_target = beats_target
         
         story_beats = []
         outline_memory = []
@@ -72,50 +95,58 @@ class EnhancedModelOrchestrator:
             
             beat_result = await self._generate_enhanced_beat(
                 prompt, beat_idx, progress, waypoints, outline_memory, 
-                options, destination_ctx, phase, generation_params
+                options, destination_ctx, phase, generation_params, prompt_sections
             )
             story_beats.append(beat_result)
             outline_memory.append(beat_result.get("outline", ""))
+            if self.on_beat_complete:
+                self.on_beat_complete(beat_idx, beat_result)
             
             if len(outline_memory) > 5:
                 outline_memory.pop(0)
         
+        # A list on purpose: str.join materializes any iterable first, so a generator saves nothing here
         final_story = "\n\n".join([beat["text"] for beat in story_beats])
         if self.tts_markers:
             final_story = self._insert_tts_markers(final_story)
         
-        # Calculate parameter compliance score
-        self.metrics["parameter_compliance_score"] = self._calculate_parameter_compliance(story_beats, generation_params)
+        # Calculate parameter compliance score once; the stats and schema below reuse it
+        compliance_avg = self._calculate_parameter_compliance(story_beats, generation_params)
+        self.metrics["parameter_compliance_score"] = compliance_avg
         
         result = {
             "story_text": final_story,
             "outline": "\n".join(outline_memory),
             "metrics": self.metrics.copy(),
-            "coherence_stats": self._calculate_coherence_stats(story_beats),
+            "coherence_stats": self._calculate_coherence_stats(story_beats, compliance_avg),
             "memory_stats": {
                 "total_beats": len(story_beats),
-                "avg_words_per_beat": sum([b.get("word_count", 0) for b in story_beats]) / max(1, len(story_beats)),
+                "avg_words_per_beat": sum(b.get("word_count", 0) for b in story_beats) / max(1, len(story_beats)),
                 "sensory_distribution": self._get_sensory_distribution(story_beats),
-                "parameter_compliance": self.metrics["parameter_compliance_score"]
+                "parameter_compliance": compliance_avg
             }
         }
         if self.strict_schema:
-            result["beats_schema"] = self._create_beats_schema(story_beats)
+            result["beats_schema"] = self._create_beats_schema(story_beats, compliance_avg)
         return result
 
     async def _generate_enhanced_beat(self, base_prompt: str, beat_idx: int, progress: float, 
                                      waypoints: List[str], outline_memory: List[str], 
                                      options: Optional[Dict], destination_ctx: Dict, 
-                                     destination_phase: str, generation_params: Dict) -> Dict[str, Any]:
+                                     destination_phase: str, generation_params: Dict,
+                                     prompt_sections: Dict[str, str]) -> Dict[str, Any]:
         
-        current_sensory = settings.SENSORY_MODES[self.current_sensory_index % len(settings.SENSORY_MODES)]
+        params_get = generation_params.get
+        metrics = self.metrics
+        sensory_modes = settings.SENSORY_MODES
+        current_sensory = sensory_modes[self.current_sensory_index % len(sensory_modes)]
         self.current_sensory_index += 1
         current_waypoint = waypoints[beat_idx % len(waypoints)] if waypoints else None
         
         # Apply sleep taper based on parameters
         density_factor = 1.0
-        taper_start = generation_params.get('taper_start_pct', settings.TAPER_START_PERCENTAGE)
-        taper_reduction = generation_params.get('taper_reduction', settings.TAPER_REDUCTION_FACTOR)
+        taper_start = params_get('taper_start_pct', settings.TAPER_START_PERCENTAGE)
+        taper_reduction = params_get('taper_reduction', settings.TAPER_REDUCTION_FACTOR)
         
         if settings.SLEEP_TAPER_ENABLED and progress >= taper_start:
             density_factor = taper_reduction
@@ -124,54 +155,45 @@ class EnhancedModelOrchestrator:
         memory_context = "\n".join(outline_memory[-3:]) if outline_memory else "Beginning of story"
         
         # Build parameter-aware prompt
-        enhanced_prompt = BEAT_GENERATION_PROMPT.format(
+        enhanced_prompt = render_beat_generation_prompt(
             story_bible=base_prompt,
             previous_text=memory_context,
             beat_title=f"Beat {beat_idx+1}",
             beat_description=beat_plan['micro_goal'],
-            target_words=generation_params.get('words_per_beat', 180),
+            target_words=params_get('words_per_beat', 180),
             sensory_focus=current_sensory,
             waypoint=current_waypoint or 'natural flow',
             destination_phase=destination_phase,
-            generation_parameters=format_generation_parameters(generation_params),
-            action_style=format_action_style(generation_params),
-            perception_requirements=format_perception_requirements(generation_params),
-            transition_requirements=format_transition_requirements(generation_params),
-            downshift_requirements=format_downshift_requirements(generation_params),
-            style_requirements=format_style_requirements(generation_params),
-            departure_instructions="introduce/recall the destination promise subtly",
-            journey_instructions="include progress markers ('ti avvicini')",
-            approach_instructions="add approach signals (glimpse, scent, sound of destination)",
-            arrival_instructions="explicit arrival + settling actions + permission to rest"
+            **prompt_sections
         )
         
         # Generator stage
-        generator_output = await self._safe_generate_with_retry(
-            self.generator_name, enhanced_prompt, options
+        generator_output, generator_words = await self._run_stage(
+            beat_idx, "generator", self.generator_name, enhanced_prompt, options
         )
-        self.metrics["generator_words"] += len(generator_output.split())
+        metrics["generator_words"] += generator_words
         
         # Reasoner stage (parameter-aware)
         reasoner_output = generator_output
         if self.use_reasoner:
             reasoner_prompt = self._build_reasoner_prompt(generator_output, generation_params)
-            reasoner_output = await self._safe_generate_with_retry(
-                self.reasoner_name, reasoner_prompt, {"temperature": 0.3}
+            reasoner_output, reasoner_words = await self._run_stage(
+                beat_idx, "reasoner", self.reasoner_name, reasoner_prompt, {"temperature": 0.3}
             )
-            self.metrics["reasoner_words"] += len(reasoner_output.split())
+            metrics["reasoner_words"] += reasoner_words
             if reasoner_output and reasoner_output != generator_output:
-                self.metrics["corrections_count"] += 1
+                metrics["corrections_count"] += 1
         
         # Polisher stage (parameter-aware)
         final_output = reasoner_output
         if self.use_polish:
             polish_prompt = self._build_polish_prompt(reasoner_output, generation_params)
-            final_output = await self._safe_generate_with_retry(
-                self.polisher_name, polish_prompt, {"temperature": 0.4}
+            final_output, polisher_words = await self._run_stage(
+                beat_idx, "polisher", self.polisher_name, polish_prompt, {"temperature": 0.4}
             )
-            self.metrics["polisher_words"] += len(final_output.split())
+            metrics["polisher_words"] += polisher_words
         
-        target_words = generation_params.get('words_per_beat', len(generator_output.split()) or 180)
+        target_words = params_get('words_per_beat', generator_words or 180)
         final_output = self._apply_length_control(final_output, target_words)
         self._update_opener_tracking(final_output)
         
@@ -186,9 +208,24 @@ class EnhancedModelOrchestrator:
             "parameter_compliance": self._validate_beat_parameters(final_output, generation_params)
         }
     
+    def _beat_prompt_sections(self, params: Dict) -> Dict[str, str]:
+        """Beat prompt sections that depend only on the story's parameters, formatted once per story"""
+        return {
+            "generation_parameters": format_generation_parameters(params),
+            "action_style": format_action_style(params),
+            "perception_requirements": format_perception_requirements(params),
+            "transition_requirements": format_transition_requirements(params),
+            "downshift_requirements": format_downshift_requirements(params),
+            "style_requirements": format_style_requirements(params),
+            "departure_instructions": "introduce/recall the destination promise subtly",
+            "journey_instructions": "include progress markers ('ti avvicini')",
+            "approach_instructions": "add approach signals (glimpse, scent, sound of destination)",
+            "arrival_instructions": "explicit arrival + settling actions + permission to rest"
+        }
+    
     def _build_reasoner_prompt(self, text: str, params: Dict) -> str:
         """Build parameter-aware reasoner prompt"""
-        embodiment_check = REASONER_EMBODIMENT_CHECKLIST.format(
+        embodiment_check = render_reasoner_embodiment_checklist(
             movement_verbs_required=params.get('movement_verbs_required', settings.MOVEMENT_VERBS_REQUIRED),
             transition_tokens_required=params.get('transition_tokens_required', settings.TRANSITION_TOKENS_REQUIRED),
             sensory_coupling=params.get('sensory_coupling', settings.SENSORY_COUPLING),
@@ -196,7 +233,7 @@ class EnhancedModelOrchestrator:
             downshift_required=params.get('downshift_required', settings.DOWNSHIFT_REQUIRED)
         )
         
-        destination_check = REASONER_DESTINATION_CHECKLIST.format(
+        destination_check = render_reasoner_destination_checklist(
             closure_required=params.get('closure_required', settings.CLOSURE_REQUIRED)
         )
         
@@ -238,31 +275,21 @@ Polished version (maintain all parameter requirements):"""
         }
         
         text_lower = text.lower()
+        params_get = params.get
         
         # POV validation
-        if params.get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON):
-            first_person = len(re.findall(r'\b(i|me|my|mine|myself)\b', text_lower))
-            third_person = len(re.findall(r'\b(he|she|they|him|her|them)\b', text_lower))
-            validation["pov_compliant"] = (first_person + third_person) == 0
+        if params_get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON):
+            validation["pov_compliant"] = _FIRST_PERSON_RE.search(text_lower) is None and _THIRD_PERSON_RE.search(text_lower) is None
         
-        # Movement verbs
-        movement_verbs = settings.MOVEMENT_VERBS
-        for verb in movement_verbs:
-            validation["movement_verbs_count"] += len(re.findall(verb, text_lower))
-        
-        # Transitions
-        transitions = settings.TRANSITION_TOKENS
-        for trans in transitions:
-            validation["transitions_count"] += len(re.findall(re.escape(trans.lower()), text_lower))
+        # Movement verbs and transitions are plain literals: str.count matches re.findall's non-overlapping count
+        validation["movement_verbs_count"] = sum(text_lower.count(verb) for verb in settings.MOVEMENT_VERBS)
+        validation["transitions_count"] = sum(text_lower.count(trans) for trans in _TRANSITION_TOKENS_LOWER)
         
         # Sensory elements (basic detection)
-        sensory_words = ['see', 'hear', 'feel', 'touch', 'smell', 'taste', 'sense', 'notice', 'perceive']
-        for word in sensory_words:
-            validation["sensory_elements_count"] += len(re.findall(f'\\b{word}', text_lower))
+        validation["sensory_elements_count"] = len(_SENSORY_WORDS_RE.findall(text_lower))
         
         # Downshift detection
-        downshift_words = ['breath', 'relax', 'ease', 'slow', 'settle', 'calm', 'gentle']
-        validation["downshift_present"] = any(word in text_lower for word in downshift_words)
+        validation["downshift_present"] = any(word in text_lower for word in _DOWNSHIFT_WORDS)
         
         # Calculate overall score
         score_components = []
@@ -272,25 +299,25 @@ Polished version (maintain all parameter requirements):"""
         else:
             score_components.append(0.0)
         
-        movement_req = params.get('movement_verbs_required', settings.MOVEMENT_VERBS_REQUIRED)
+        movement_req = params_get('movement_verbs_required', settings.MOVEMENT_VERBS_REQUIRED)
         if validation["movement_verbs_count"] >= movement_req:
             score_components.append(1.0)
         else:
             score_components.append(validation["movement_verbs_count"] / max(1, movement_req))
         
-        transition_req = params.get('transition_tokens_required', settings.TRANSITION_TOKENS_REQUIRED)
+        transition_req = params_get('transition_tokens_required', settings.TRANSITION_TOKENS_REQUIRED)
         if validation["transitions_count"] >= transition_req:
             score_components.append(1.0)
         else:
             score_components.append(validation["transitions_count"] / max(1, transition_req))
         
-        sensory_req = params.get('sensory_coupling', settings.SENSORY_COUPLING)
+        sensory_req = params_get('sensory_coupling', settings.SENSORY_COUPLING)
         if validation["sensory_elements_count"] >= sensory_req:
             score_components.append(1.0)
         else:
             score_components.append(validation["sensory_elements_count"] / max(1, sensory_req))
         
-        if params.get('downshift_required', settings.DOWNSHIFT_REQUIRED):
+        if params_get('downshift_required', settings.DOWNSHIFT_REQUIRED):
             score_components.append(1.0 if validation["downshift_present"] else 0.0)
         
         validation["overall_score"] = sum(score_components) / len(score_components)
@@ -310,8 +337,7 @@ Polished version (maintain all parameter requirements):"""
         return sum(compliance_scores) / len(compliance_scores)
 
     def _extract_waypoints_from_setting(self, setting: Dict) -> List[str]:
-        default_waypoints = ["entry path", "gentle bend", "small clearing", "wooden bridge", "soft moss hollow"]
-        return setting.get("theme", {}).get("spatial_waypoints", default_waypoints)
+        return setting.get("theme", {}).get("spatial_waypoints", settings.DEFAULT_WAYPOINTS)
 
     def _destination_phase(self, progress: float) -> str:
         if progress < 0.3: return "departure"
@@ -327,13 +353,13 @@ Polished version (maintain all parameter requirements):"""
             "settling": "Allow peaceful absorption of the moment"
         }
 
-    def _calculate_coherence_stats(self, story_beats: List[Dict]) -> Dict:
+    def _calculate_coherence_stats(self, story_beats: List[Dict], compliance_avg: float) -> Dict:
         return {
             "total_beats": len(story_beats),
-            "sensory_transitions": len(set([b.get("sensory_mode") for b in story_beats])),
-            "avg_density_factor": sum([b.get("density_factor", 1.0) for b in story_beats]) / max(1, len(story_beats)),
+            "sensory_transitions": len({b.get("sensory_mode") for b in story_beats}),
+            "avg_density_factor": sum(b.get("density_factor", 1.0) for b in story_beats) / max(1, len(story_beats)),
             "corrections_applied": self.metrics.get("corrections_count", 0),
-            "parameter_compliance_avg": sum([b.get("parameter_compliance", {}).get("overall_score", 0.0) for b in story_beats]) / max(1, len(story_beats))
+            "parameter_compliance_avg": compliance_avg
         }
 
     def _get_sensory_distribution(self, story_beats: List[Dict]) -> Dict:
@@ -343,7 +369,8 @@ Polished version (maintain all parameter requirements):"""
             dist[m] = dist.get(m, 0) + 1
         return dist
 
-    def _create_beats_schema(self, story_beats: List[Dict]) -> Dict:
+    def _create_beats_schema(self, story_beats: List[Dict], compliance_avg: float) -> Dict:
+        timings = [b.get("word_count", 150) / 150 * 60 for b in story_beats]
         return {
             "beats": [
                 {
@@ -352,7 +379,7 @@ Polished version (maintain all parameter requirements):"""
                     "sensory_mode": b.get("sensory_mode"),
                     "waypoint": b.get("waypoint"),
                     "word_count": b.get("word_count"),
-                    "timing_estimate": b.get("word_count", 150) / 150 * 60,
+                    "timing_estimate": timings[i],
                     "media_cues": {
                         "visual_focus": b.get("sensory_mode") == "sight",
                         "audio_focus": b.get("sensory_mode") == "sound",
@@ -361,30 +388,52 @@ Polished version (maintain all parameter requirements):"""
                     "parameter_compliance": b.get("parameter_compliance", {})
                 } for i, b in enumerate(story_beats)
             ],
-            "total_estimated_duration": sum([b.get("word_count", 150) / 150 * 60 for b in story_beats]),
+            "total_estimated_duration": sum(timings),
             "schema_version": "2.0-enhanced",
             "parameter_summary": {
-                "avg_compliance_score": sum([b.get("parameter_compliance", {}).get("overall_score", 0.0) for b in story_beats]) / max(1, len(story_beats))
+                "avg_compliance_score": compliance_avg
             }
         }
 
-    async def _safe_generate_with_retry(self, model: str, prompt: str, options: Optional[Dict] = None) -> str:
+    async def _run_stage(self, beat_idx: int, stage: str, model: str, prompt: str, options: Optional[Dict]) -> Tuple[str, int]:
+        """Run one model stage of a beat between the stage hooks; returns (text, word count)."""
+        total = self._beats_target
+        if self.on_stage_start:
+            await self.on_stage_start(beat_idx, total, stage)
+        on_progress = None
+        if self.on_stage_progress:
+            async def _report(chunks: int) -> None:
+                await self.on_stage_progress(beat_idx, total, stage, chunks)
+            on_progress = _report
+        output = await self._safe_generate_with_retry(model, prompt, options, on_progress=on_progress)
+        words = len(output.split())
+        if self.on_stage_end:
+            await self.on_stage_end(beat_idx, total, stage, words)
+        return output, words
+
+    async def _safe_generate_with_retry(self, model: str, prompt: str, options: Optional[Dict] = None,
+                                        on_progress: Optional[Callable[[int], Awaitable[None]]] = None) -> str:
         opts = options or {"temperature": 0.7, "num_predict": 300}
         last_error = None
         for attempt in range(settings.MAX_RETRIES):
             try:
-                response = self.client.generate(model=model, prompt=prompt, options=opts)
-                result = response.get("response", "").strip()
+                # Streamed so progress can be reported while the model is still writing
+                parts: List[str] = []
+                async for chunk in await self.aclient.generate(model=model, prompt=prompt, options=opts, stream=True):
+                    parts.append(chunk.get("response", ""))
+                    if on_progress is not None and len(parts) % _PROGRESS_EVERY_CHUNKS == 0:
+                        await on_progress(len(parts))
+                result = "".join(parts).strip()
                 if result:
                     return result
                 else:
                     raise ValueError("Empty response from model")
             except Exception as e:
                 last_error = e
-                logger.warning(f"Generate attempt {attempt+1} failed for {model}: {e}")
+                logger.warning("Generate attempt %d failed for %s: %s", attempt + 1, model, e)
                 if attempt < settings.MAX_RETRIES - 1:
                     await asyncio.sleep(settings.RETRY_DELAY)
-        logger.error(f"All attempts failed for {model}")
+        logger.error("All attempts failed for %s", model)
         return "[Error: Unable to generate content]"
 
     def _apply_length_control(self, text: str, target_words: int) -> str:
@@ -413,7 +462,7 @@ Polished version (maintain all parameter requirements):"""
     def _insert_tts_markers(self, story_text: str) -> str:
         if not self.tts_markers:
             return story_text
-        sentences = re.split(r'[.!?]+', story_text)
+        sentences = _SENTENCE_SPLIT_RE.split(story_text)
         marked = []
         for i, s in enumerate(sentences):
             if not s.strip():
@@ -421,7 +470,7 @@ Polished version (maintain all parameter requirements):"""
             t = s.strip()
             if i > 0 and i % settings.TTS_BREATHE_FREQUENCY == 0:
                 t = "[BREATHE] " + t
-            if i > 0 and len(t.split()) > 15:
+            if i > 0 and len(t.split(None, 15)) > 15:
                 pause = settings.TTS_PAUSE_MIN + (settings.TTS_PAUSE_MAX - settings.TTS_PAUSE_MIN) * 0.5
                 t += f" [PAUSE:{pause:.1f}]"
             marked.append(t)
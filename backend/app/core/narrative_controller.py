@@ -3,6 +3,8 @@ from typing import Optional, Callable, List, Dict
 import json
 import re
 
+import numpy as np
+
 from app.core.config import settings
 from app.core.memory_system import MemorySystem
 from app.core.coherence_system import CoherenceSystem
@@ -27,21 +29,17 @@ class NarrativeController:
     
     def _distribute_targets_progressive(self) -> List[int]:
         base = self.target_words_total // self.total_beats
-        targets = []
-        for i in range(self.total_beats):
-            # Slight taper for sleep effect (start a bit higher, end a bit lower)
-            multiplier = 1.15 - (0.30 * i / max(1, self.total_beats - 1))
-            targets.append(int(base * multiplier))
-        # Normalize to exact total
-        diff = self.target_words_total - sum(targets)
+        # Slight taper for sleep effect (start a bit higher, end a bit lower)
+        multipliers = 1.15 - (0.30 * np.arange(self.total_beats) / max(1, self.total_beats - 1))
+        targets = (base * multipliers).astype(np.int64)
+        # Normalize to exact total: spread the difference one word at a time from the first beat
+        diff = self.target_words_total - int(targets.sum())
         if diff != 0:
+            rounds, rest = divmod(abs(diff), self.total_beats)
             step = 1 if diff > 0 else -1
-            idx = 0
-            while diff != 0:
-                targets[idx % self.total_beats] += step
-                diff -= step
-                idx += 1
-        return targets
+            targets += step * rounds
+            targets[:rest] += step
+        return targets.tolist()
     
     def target_for(self, beat_index: int) -> int:
         return self._targets[min(max(beat_index-1, 0), self.total_beats-1)]
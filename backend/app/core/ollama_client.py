@@ -0,0 +1,27 @@
+# Ollama async clients with pooled keep-alive HTTP connections
+from typing import Tuple
+
+import httpx
+import ollama
+
+from app.core.config import settings
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY
+    )
+
+
+def new_async_client() -> Tuple[ollama.AsyncClient, httpx.AsyncHTTPTransport]:
+    """Return a new async client for settings.OLLAMA_URL and the pooled transport it uses.
+
+    Not shared: httpx async pools are bound to the event loop that first uses
+    them and every job runs on its own loop, so each job owns one client.
+    The owner closes the transport (await transport.aclose()) before its loop closes.
+    """
+    transport = httpx.AsyncHTTPTransport(limits=_limits())
+    return ollama.AsyncClient(host=settings.OLLAMA_URL, transport=transport), transport
+
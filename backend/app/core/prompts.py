@@ -1,14 +1,16 @@
 # Enhanced prompts with full parameter support for all configuration options
+#
+# Theme, outline and unified prompts keep the long static instructions first and
+# the per-story INPUT block last, so consecutive requests share a byte-identical
+# prefix and Ollama can reuse its KV cache for it.
 
 THEME_ANALYSIS_PROMPT = '''You are a creative analyst for sleep stories with advanced parameter awareness.
 
-Given theme: {theme}
-Additional description: {description}
 POV Mode: {pov_mode}
 Sensory Coupling Level: {sensory_coupling}
 Movement Style: {movement_style}
 
-Analyze and extract sensory elements optimized for the specified parameters, output as JSON:
+Analyze the theme given under INPUT and extract sensory elements optimized for the specified parameters, output as JSON:
 {{
   "setting": "detailed location matching movement style",
   "time_of_day": "dawn/dusk/night",
@@ -21,14 +23,17 @@ Analyze and extract sensory elements optimized for the specified parameters, out
   "sensory_opportunities": {{"sight": [], "sound": [], "touch": [], "smell": [], "proprioception": []}},
   "movement_opportunities": ["embodied actions for {movement_style}"],
   "pov_considerations": "specific guidance for {pov_mode} narration"
-}}\n'''
+}}
+
+INPUT:
+Given theme: {theme}
+Additional description: {description}
+'''
 
 OUTLINE_GENERATION_PROMPT = '''You are a master storyteller for calming sleep narratives with parameter-aware planning.
 
-TASK: Create a 3-act outline for a {duration}-minute sleep story.
+TASK: Create a 3-act outline for the sleep story described under INPUT.
 
-THEME: {theme}
-TARGET WORDS: {target_words} ({duration} min x 140 wpm)
 BEATS: {beats} total
 
 GENERATION PARAMETERS:
@@ -73,7 +78,89 @@ OUTPUT strict JSON with parameter compliance:
       ]
     }}
   ]
-}}\n'''
+}}
+
+INPUT:
+DURATION: {duration} minutes
+TARGET WORDS: {target_words} ({duration} min x 140 wpm)
+THEME: {theme}
+'''
+
+UNIFIED_THEME_OUTLINE_PROMPT = '''You are a creative analyst and master storyteller for calming sleep narratives with parameter-aware planning.
+
+POV Mode: {pov_mode}
+Sensory Coupling Level: {sensory_coupling}
+Movement Style: {movement_style}
+
+TASK 1: Analyze the theme given under INPUT and extract sensory elements optimized for the specified parameters.
+TASK 2: Using that analysis, create a 3-act outline for the sleep story described under INPUT.
+BEATS: {beats} total
+
+GENERATION PARAMETERS:
+- POV Enforcement: {pov_enforce}
+- Embodiment Level: {embodiment_level} movement verbs per beat
+- Sensory Coupling: {sensory_coupling} senses per beat
+- Destination Required: {destination_required}
+
+OUTPUT one strict JSON object with both results:
+{{
+  "enriched_theme": {{
+    "setting": "detailed location matching movement style",
+    "time_of_day": "dawn/dusk/night",
+    "mood": "peaceful",
+    "sensory_elements": ["visual", "audio", "tactile", "olfactory"],
+    "key_objects": ["list", "of", "objects"],
+    "atmosphere": "description emphasizing {pov_mode} perspective",
+    "spatial_waypoints": ["point1", "point2", "point3", "point4", "point5"],
+    "sleep_elements": ["gentle rhythm", "calming imagery"],
+    "sensory_opportunities": {{"sight": [], "sound": [], "touch": [], "smell": [], "proprioception": []}},
+    "movement_opportunities": ["embodied actions for {movement_style}"],
+    "pov_considerations": "specific guidance for {pov_mode} narration"
+  }},
+  "outline": {{
+    "story_bible": {{
+      "setting": "location",
+      "time_of_day": "dawn/dusk/night",
+      "key_objects": ["object1", "object2"],
+      "mood_baseline": 8,
+      "pov_style": "strict_second_person" if {pov_enforce} else "flexible",
+      "embodiment_requirements": {{
+        "movement_verbs_per_beat": {embodiment_level},
+        "spatial_transitions_required": true,
+        "destination_arc_enabled": {destination_required}
+      }},
+      "sensory_requirements": {{
+        "coupling_level": {sensory_coupling},
+        "rotation_enabled": true
+      }}
+    }},
+    "acts": [
+      {{
+        "act_number": 1,
+        "title": "Departure",
+        "beats": [
+          {{
+            "beat_id": 1,
+            "title": "Destination Promise",
+            "target_words": 600,
+            "description": "Establish clear destination with {embodiment_level} movement verbs, {sensory_coupling} sensory elements",
+            "sensory_focus": ["sight", "sound"],
+            "waypoint": "entry path",
+            "pov_instructions": "Use strict 2nd person present" if {pov_enforce} else "Prefer 2nd person",
+            "embodiment_checklist": ["movement verb", "spatial transition", "consequent perception"]
+          }}
+        ]
+      }}
+    ]
+  }}
+}}
+
+INPUT:
+Given theme: {theme}
+Additional description: {description}
+DURATION: {duration} minutes
+TARGET WORDS: {target_words} ({duration} min x 140 wpm)
+'''
 
 BEAT_GENERATION_PROMPT = '''PARAMETER-AWARE BEAT GENERATION
 
@@ -162,7 +249,9 @@ ELSE: Specify required improvements for parameter compliance
 '''
 
 # Helper functions unchanged...
-from typing import Dict
+import hashlib
+from string import Formatter
+from typing import Callable, Dict, List
 
 def format_generation_parameters(params: dict) -> str:
     formatted = []
@@ -233,3 +322,41 @@ def format_downshift_requirements(params: dict) -> str:
         return "explicit relaxation cues (breath slows, shoulders release, pace softens)"
     else:
         return "optional gentle relaxation elements"
+
+def compile_prompt(template: str) -> Callable[..., str]:
+    """Pre-split a str.format template so rendering is a single join.
+
+    Only plain {field} placeholders are supported (no format specs or
+    conversions), which is all the templates above use; {{ }} escapes are
+    resolved at compile time. Missing fields raise KeyError like .format().
+    """
+    literals: List[str] = []
+    fields: List[str] = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        if field is not None and (spec or conversion):
+            raise ValueError(f"Unsupported placeholder {{{field}!{conversion}:{spec}}} in prompt template")
+        literals.append(literal)
+        fields.append(field)
+    segments = tuple(zip(literals, fields))
+
+    def render(**kwargs) -> str:
+        out = []
+        for literal, field in segments:
+            out.append(literal)
+            if field is not None:
+                out.append(str(kwargs[field]))
+        return "".join(out)
+
+    return render
+
+# Changes whenever a theme/outline template does, so cached responses from older prompts are not reused
+THEME_OUTLINE_PROMPT_VERSION = hashlib.sha256(
+    (THEME_ANALYSIS_PROMPT + OUTLINE_GENERATION_PROMPT + UNIFIED_THEME_OUTLINE_PROMPT).encode("utf-8")
+).hexdigest()[:12]
+
+render_theme_analysis_prompt = compile_prompt(THEME_ANALYSIS_PROMPT)
+render_outline_generation_prompt = compile_prompt(OUTLINE_GENERATION_PROMPT)
+render_unified_theme_outline_prompt = compile_prompt(UNIFIED_THEME_OUTLINE_PROMPT)
+render_beat_generation_prompt = compile_prompt(BEAT_GENERATION_PROMPT)
+render_reasoner_embodiment_checklist = compile_prompt(REASONER_EMBODIMENT_CHECKLIST)
+render_reasoner_destination_checklist = compile_prompt(REASONER_DESTINATION_CHECKLIST)
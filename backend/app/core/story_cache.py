@@ -0,0 +1,158 @@
+# Exact + semantic cache for theme analysis and outline generation responses
+import copy
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from app.core.config import settings
+
+import logging
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 512
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Embed text as an L2-normalised bag of hashed character trigrams.
+
+    Cheap, dependency-free and stable across processes (crc32 rather than the
+    salted builtin hash), which is all near-duplicate theme matching needs.
+    """
+    vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    t = f"  {' '.join(text.lower().split())} "
+    for i in range(len(t) - 2):
+        vec[zlib.crc32(t[i:i + 3].encode("utf-8")) % EMBEDDING_DIM] += 1.0
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+class ThemeOutlineCache:
+    """In-memory two-tier cache of parsed LLM JSON responses.
+
+    Entries are grouped by kind ("theme", "outline") and only match when the
+    parameter fingerprint is identical. An identical text is an exact hit
+    (a dict lookup); otherwise, when semantic matching is on, the closest
+    embedding wins if its cosine similarity reaches the threshold.
+
+    With a path, entries are also written through to SQLite (WAL mode) and
+    reloaded on start, so a restarted worker keeps its warm cache.
+    Fingerprints must then be JSON-serializable tuples of scalars.
+    """
+
+    def __init__(self, max_entries: int = 256, threshold: float = 0.95, semantic: bool = True, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.semantic = semantic
+        self._entries: "OrderedDict[Tuple[str, Hashable, str], Tuple[Optional[np.ndarray], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        if path:
+            try:
+                self._db = self._connect(path)
+                self._load()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("Persistent cache at %s unavailable, using memory only: %s", path, e)
+                self._db = None
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA mmap_size=268435456")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "kind TEXT NOT NULL, fingerprint TEXT NOT NULL, text TEXT NOT NULL, "
+            "response BLOB NOT NULL, embedding BLOB, created_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, fingerprint, text))"
+        )
+        return db
+
+    def _load(self) -> None:
+        rows = self._db.execute(
+            "SELECT kind, fingerprint, text, response, embedding FROM entries ORDER BY created_at DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        for kind, fingerprint, text, response, embedding in reversed(rows):
+            emb = np.frombuffer(embedding, dtype=np.float32).copy() if embedding is not None and self.semantic else None
+            self._entries[(kind, tuple(orjson.loads(fingerprint)), text)] = (emb, orjson.loads(response))
+        logger.info("Loaded %d cached theme/outline entries", len(self._entries))
+
+    def get(self, kind: str, text: str, fingerprint: Hashable, semantic: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+        """Look up a cached value; semantic=False restricts this call to exact matches."""
+        key = (kind, fingerprint, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                logger.info("Exact cache hit (%s)", kind)
+                return copy.deepcopy(entry[1])
+            if not (self.semantic and semantic is not False):
+                self.misses += 1
+                return None
+        emb = embed_text(text)
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == kind and k[1] == fingerprint and self._entries[k][0] is not None]
+            if keys:
+                sims = np.stack([self._entries[k][0] for k in keys]) @ emb
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.hits += 1
+                    logger.info("Semantic cache hit (%s, similarity %.3f)", kind, float(sims[best]))
+                    return copy.deepcopy(self._entries[keys[best]][1])
+            self.misses += 1
+        return None
+
+    def put(self, kind: str, text: str, fingerprint: Hashable, value: Dict[str, Any], semantic: Optional[bool] = None) -> None:
+        emb = embed_text(text) if self.semantic and semantic is not False else None
+        with self._lock:
+            self._entries[(kind, fingerprint, text)] = (emb, copy.deepcopy(value))
+            self._entries.move_to_end((kind, fingerprint, text))
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if self._db is not None:
+                self._persist(kind, fingerprint, text, value, emb, evicted)
+
+    def _persist(self, kind: str, fingerprint: Hashable, text: str, value: Dict[str, Any],
+                 emb: Optional[np.ndarray], evicted: List[Tuple[str, Hashable, str]]) -> None:
+        try:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, orjson.dumps(fingerprint).decode(), text, orjson.dumps(value),
+                     emb.tobytes() if emb is not None else None, time.time())
+                )
+                self._db.executemany(
+                    "DELETE FROM entries WHERE kind = ? AND fingerprint = ? AND text = ?",
+                    [(k, orjson.dumps(fp).decode(), t) for k, fp, t in evicted]
+                )
+        except (sqlite3.Error, TypeError) as e:
+            logger.warning("Failed to persist %s cache entry: %s", kind, e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+
+
+theme_outline_cache = ThemeOutlineCache(
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    semantic=settings.SEMANTIC_CACHE_ENABLED,
+    path=settings.SEMANTIC_CACHE_PATH or None
+)
@@ -1,21 +1,127 @@
 import ollama
-from typing import Optional, Callable, Dict, List, Any
-import json
+from typing import Optional, Callable, Dict, List, Any, Set, Tuple
+import orjson
 import re
 import asyncio
-from datetime import datetime
+import hashlib
+import time
+import unicodedata
+from functools import cached_property
+from types import MappingProxyType
 
 from app.core.config import settings
 from app.core.memory_system import MemorySystem
 from app.core.coherence_system import CoherenceSystem
 from app.core.narrative_controller import NarrativeController
 from app.core.model_orchestrator import EnhancedModelOrchestrator
-from app.core.prompts import THEME_ANALYSIS_PROMPT, OUTLINE_GENERATION_PROMPT
+from app.core.prompts import (
+    THEME_OUTLINE_PROMPT_VERSION,
+    render_theme_analysis_prompt,
+    render_outline_generation_prompt,
+    render_unified_theme_outline_prompt
+)
 from app.core.embodiment_destination_validators import EmbodimentValidator, DestinationValidator
+from app.core.story_cache import theme_outline_cache
 
 import logging
 logger = logging.getLogger(__name__)
 
+_TTS_MARKER_RE = re.compile(r'\[PAUSE:\d+\.\d+\]|\[BREATHE\]')
+_JSON_STRUCT_RE = re.compile(r'[{}"\\]')
+_PARAGRAPH_SPLIT_RE = re.compile(r'\n\n+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _normalize_theme(text: str) -> str:
+    """Canonical form of user theme text for cache keys: "Forest  Walk." and "forest walk" match."""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFKC', text).casefold()).strip(' .!?;:,')
+
+# A unified theme/outline response must carry at least these theme fields to be used
+_REQUIRED_THEME_FIELDS = frozenset({'setting', 'mood', 'sensory_elements'})
+
+# Fallback theme values, built once; callers get fresh lists since themes are mutated and cached
+_DEFAULT_WAYPOINTS = tuple(settings.DEFAULT_WAYPOINTS)
+_FALLBACK_SENSORY_ELEMENTS = ('sight', 'sound')
+
+# Reasoner corrections are roughly as long as the beat they replace
+_CORRECTION_MAX_TOKENS = 300
+_CORRECTION_STOP = ["\n\n\n", "ORIGINAL TEXT:", "CORRECTED VERSION:"]
+
+def _correction_budget(text: str) -> int:
+    return min(_CORRECTION_MAX_TOKENS, int(len(text.split()) * 1.5) + 32)
+
+_DESTINATION_ARCHETYPES = MappingProxyType(getattr(settings, 'DESTINATION_ARCHETYPES', {
+    'safe_shelter': ['cottage','cabin','sanctuary','grove'],
+    'peaceful_vista': ['meadow','clearing','overlook','garden'],
+    'restorative_water': ['pool','stream','cove','spring'],
+    'sacred_space': ['temple','circle','altar','threshold']
+}))
+
+def _default_destination_name() -> str:
+    try:
+        return next(iter(_DESTINATION_ARCHETYPES.values()))[0]
+    except (StopIteration, IndexError, TypeError):
+        return 'grove'
+
+# Resolved once at import; _setup_destination_promise hands out copies
+_DEFAULT_DESTINATION_CTX = MappingProxyType({
+    'name': _default_destination_name(),
+    'promise': 'a safe, soft place to rest',
+    'appeal': 'warmth, protection, quiet'
+})
+
+class _JsonObjectScanner:
+    """Incremental form of StoryGenerator._extract_json for streamed responses.
+
+    Chunks are fed as they arrive; feed() returns the first balanced {...}
+    object as soon as its closing brace is seen, None until then (and after).
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._offset = 0
+        self._begin = -1
+        self._depth = 0
+        self._in_str = False
+        self._skip_to = -1
+        self._done = False
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._parts)
+
+    def feed(self, chunk: str) -> Optional[str]:
+        base = self._offset
+        self._parts.append(chunk)
+        self._offset += len(chunk)
+        if self._done:
+            return None
+        begin, depth, in_str, skip_to = self._begin, self._depth, self._in_str, self._skip_to
+        for m in _JSON_STRUCT_RE.finditer(chunk):
+            i = base + m.start()
+            if i < skip_to:
+                continue
+            ch = m.group()
+            if begin == -1:
+                if ch != '{':
+                    continue
+                begin = i
+            if in_str:
+                if ch == '\\':
+                    skip_to = i + 2
+                elif ch == '"':
+                    in_str = False
+            elif ch == '"':
+                in_str = True
+            elif ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    self._done = True
+                    return self.text[begin:i + 1]
+        self._begin, self._depth, self._in_str, self._skip_to = begin, depth, in_str, skip_to
+        return None
+
 class StoryGenerator:
     """Enhanced Story Generator with multi-model support, embodiment and destination arc."""
     
@@ -29,10 +135,10 @@ class StoryGenerator:
                  strict_schema: bool = False,
                  generation_params: Optional[dict] = None):
         
-        self.client = ollama.Client(host=settings.OLLAMA_URL)
         self.generation_params = generation_params or {}
         
-        self.orchestrator = EnhancedModelOrchestrator(
+        # Subsystems are built on first use (see the cached properties below)
+        self._orchestrator_kwargs = dict(
             generator=(models or {}).get('generator') if models else None,
             reasoner=(models or {}).get('reasoner') if models else None,
             polisher=(models or {}).get('polisher') if models else None,
@@ -41,14 +147,34 @@ class StoryGenerator:
             tts_markers=tts_markers,
             strict_schema=strict_schema
         )
-        self.coherence_system = CoherenceSystem()
         self.tts_markers = tts_markers
         self.strict_schema = strict_schema
+        # Known without building the orchestrator, so cache lookups stay cheap
+        self.generator_name = self._orchestrator_kwargs['generator'] or settings.DEFAULT_MODELS['generator']
         
         self.embodiment_validator = EmbodimentValidator()
         self.destination_validator = DestinationValidator()
+        self._base_prompt_prefix = self._build_base_prompt_prefix()
         
-        logger.info(f"StoryGenerator initialized - Models: {models or 'defaults'}, TTS: {tts_markers}, Schema: {strict_schema}")
+        logger.info("StoryGenerator initialized - Models: %s, TTS: %s, Schema: %s", models or 'defaults', tts_markers, strict_schema)
+    
+    @property
+    def aclient(self) -> ollama.AsyncClient:
+        # One pool per job: reuse the orchestrator's loop-bound client
+        return self.orchestrator.aclient
+
+    @cached_property
+    def orchestrator(self) -> EnhancedModelOrchestrator:
+        return EnhancedModelOrchestrator(**self._orchestrator_kwargs)
+
+    @cached_property
+    def coherence_system(self) -> CoherenceSystem:
+        return CoherenceSystem()
+
+    async def aclose(self) -> None:
+        """Release the job's pooled Ollama connections; call on the loop that used them."""
+        if 'orchestrator' in self.__dict__:
+            await self.orchestrator.aclose()
     
     async def generate_enhanced_story(self, 
                                     theme: str, 
@@ -57,19 +183,30 @@ class StoryGenerator:
                                     job_id: Optional[str] = None,
                                     update_callback: Optional[Callable] = None,
                                     custom_waypoints: Optional[List[str]] = None) -> Dict[str, Any]:
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         def update(progress: float, step: str, step_num: int = 0, stage_metrics=None):
             if update_callback:
                 update_callback(progress, step, step_num, stage_metrics)
-            logger.info(f'Enhanced progress: {progress}% - {step}')
+            logger.debug('Enhanced progress: %s%% - %s', progress, step)
         
-        # 1) Theme analysis
+        # 1) Theme analysis, fused with the outline into one call unless the theme is cached
         update(5, 'Analyzing theme with enhanced AI understanding...', 1)
-        enriched_theme = await self._analyze_theme_enhanced(theme, description)
+        enriched_theme = self._cached_theme(theme, description)
+        outline = None
+        if enriched_theme is None:
+            unified = await self._analyze_and_outline_unified(theme, description, duration)
+            if unified is not None:
+                enriched_theme, outline = unified
+            else:
+                # Separate calls: the outline below is generated from the enriched analysis
+                enriched_theme = await self._analyze_theme_enhanced(theme, description)
         
         update(10, 'Generating enhanced story outline with waypoints...', 2)
-        outline = await self._generate_outline_enhanced(enriched_theme, duration, custom_waypoints)
+        if outline is None:
+            outline = await self._generate_outline_enhanced(enriched_theme, duration, custom_waypoints)
+        
+        destination_ctx = self._setup_destination_promise(enriched_theme, {})
         
         # 2) Systems init
         update(15, 'Initializing coherence and memory systems...', 3)
@@ -77,12 +214,14 @@ class StoryGenerator:
         self.coherence_system.initialize_story_bible(outline.get('story_bible', {}))
         
         acts = outline.get('acts', [])
-        total_beats = sum(len(act.get('beats', [])) for act in acts) or settings.BEATS_PER_STORY
+        total_beats = 0
+        for act in acts:
+            total_beats += len(act.get('beats') or ())  # `or ()` also covers "beats": null from the model
+        total_beats = total_beats or settings.BEATS_PER_STORY
         target_words_total = duration * settings.TARGET_WPM
         controller = NarrativeController(total_beats=total_beats, target_words_total=target_words_total)
         
-        # 3) Destination setup
-        destination_ctx = self._setup_destination_promise(enriched_theme, outline)
+        # 3) Destination promise
         update(20, 'Beginning journey with destination promise...', 4)
         
         # Build setting context passed to orchestrator
@@ -103,33 +242,41 @@ class StoryGenerator:
         
         update(70, 'Validating embodiment and destination arc...', 5)
         beats = self._extract_beats_from_result(enhanced_result)
+        texts = [b.get("text", "") for b in beats]
+        # Substring checks taking microseconds per beat: scored in one pass, inline
+        embodiment_scores: List[int] = [0] * len(beats)
         missing_beats_idx: List[int] = []
-        for idx, beat in enumerate(beats):
-            v = self.embodiment_validator.validate_beat(beat.get("text", ""))
+        for idx, v in enumerate(self.embodiment_validator.validate_beats(texts)):
+            embodiment_scores[idx] = v["score"]
             if not v["ok"]:
                 missing_beats_idx.append(idx)
-        dest_check = self.destination_validator.validate_destination_arc(beats)
+        dest_check = self.destination_validator.validate_destination_arc(beats, texts=texts)
         
         if (missing_beats_idx or not dest_check["ok"]) and self.orchestrator.use_reasoner:
             update(75, 'Applying embodiment/destination corrections...', 6)
-            beats = await self._reasoner_fix_beats(beats, missing_beats_idx, destination_ctx)
-            dest_check = self.destination_validator.validate_destination_arc(beats)
+            beats, changed_idx = await self._reasoner_fix_beats(beats, missing_beats_idx, destination_ctx, texts=texts)
+            # Only corrected beats need re-scoring; the rest keep their first-pass score
+            if changed_idx:
+                order = sorted(changed_idx)
+                rescored = self.embodiment_validator.validate_batch([texts[idx] for idx in order])
+                for idx, score in zip(order, rescored):
+                    embodiment_scores[idx] = score
+                dest_check = self.destination_validator.validate_destination_arc(beats, texts=texts)
         
-        final_story_text = "\n\n".join([b.get("text", "") for b in beats])
-        if not self.tts_markers and not self.strict_schema:
-            final_story_text = self._final_polish(final_story_text)
+        final_story_text, english_word_count = self._finalize_story(
+            texts,
+            polish=not self.tts_markers and not self.strict_schema
+        )
         
         update(90, 'Calculating metrics and statistics...', 7)
-        generation_time = (datetime.now() - start_time).total_seconds()
-        english_word_count = len(final_story_text.split())
+        generation_time = time.perf_counter() - start_time
         target_words = target_words_total
         accuracy_percent = round(abs(english_word_count - target_words) / max(1, target_words) * 100, 2)
         duration_estimate = round(english_word_count / settings.TARGET_WPM, 1)
         
         coherence_stats = enhanced_result.get("coherence_stats", {})
-        embodiment_scores = [self.embodiment_validator.validate_beat(b.get("text", ""))["score"] for b in beats]
         coherence_stats.update({
-            "embodiment_score_avg": sum(embodiment_scores)/max(1,len(embodiment_scores)),
+            "embodiment_score_avg": (sum(embodiment_scores) / len(embodiment_scores)) if embodiment_scores else 0.0,
             "destination_completion": dest_check["ok"],
             "destination_missing": dest_check.get("missing", [])
         })
@@ -174,12 +321,21 @@ class StoryGenerator:
         update(100, '✅ Enhanced generation complete!', 8)
         return result
 
-    async def _reasoner_fix_beats(self, beats: List[Dict], missing_beats_idx: List[int], destination_ctx: Dict) -> List[Dict]:
-        """Fix embodiment and destination issues in specific beats using reasoner model"""
+    async def _reasoner_fix_beats(self, beats: List[Dict], missing_beats_idx: List[int], destination_ctx: Dict,
+                                  texts: Optional[List[str]] = None) -> Tuple[List[Dict], Set[int]]:
+        """Fix embodiment and destination issues in specific beats using reasoner model.
+
+        texts, when given, holds the beat texts and is updated in place with the corrections.
+        Returns the beats and the set of indices whose text was actually replaced.
+        """
+        changed_idx: Set[int] = set()
         if not self.orchestrator.use_reasoner or not missing_beats_idx:
-            return beats
+            return beats, changed_idx
         
         fixed_beats = beats.copy()
+        if texts is None:
+            texts = [b.get("text", "") for b in fixed_beats]
+        targets = [idx for idx in missing_beats_idx if idx < len(fixed_beats)]
         
         # Get generation parameters for enforcing rules
         pov_enforce = self.generation_params.get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON)
@@ -187,102 +343,244 @@ class StoryGenerator:
         transition_required = self.generation_params.get('transition_tokens_required', settings.TRANSITION_TOKENS_REQUIRED)
         downshift_required = self.generation_params.get('downshift_required', settings.DOWNSHIFT_REQUIRED)
         
-        for idx in missing_beats_idx:
-            if idx < len(fixed_beats):
-                original_text = fixed_beats[idx].get("text", "")
-                
-                # Construct correction prompt with parameters
-                correction_prompt = f"""Fix embodiment and destination arc issues in this sleep story beat:
-
-ORIGINAL TEXT:
-{original_text}
-
-REQUIREMENTS:
+        requirements = f"""REQUIREMENTS:
 - POV: {'Enforce strict 2nd person present tense' if pov_enforce else 'Prefer 2nd person but allow flexibility'}
 - Movement: Include at least {movement_required} movement verb(s) (walk, move, approach, etc.)
 - Transitions: Add at least {transition_required} spatial transition(s) (beyond, through, toward, etc.)
 - Downshift: {'Include relaxation cues (breath slows, shoulders ease)' if downshift_required else 'Optional relaxation elements'}
 - Maintain destination promise: {destination_ctx.get('promise', 'peaceful rest')}
 - Keep soothing, sleep-inducing tone
-- Target sensory coupling: {self.generation_params.get('sensory_coupling', settings.SENSORY_COUPLING)} sensory elements
+- Target sensory coupling: {self.generation_params.get('sensory_coupling', settings.SENSORY_COUPLING)} sensory elements"""
+        
+        def _apply(idx: int, corrected: Any) -> None:
+            # maxsplit bounds the scan: only the first 21 words are ever split off
+            if isinstance(corrected, str) and len(corrected.split(None, 20)) > 20:
+                texts[idx] = fixed_beats[idx]["text"] = corrected.strip()
+                changed_idx.add(idx)
+                logger.info("Fixed embodiment issues in beat %d", idx)
+        
+        # Several broken beats: one JSON-mode call for all of them
+        if len(targets) > 1:
+            numbered = "\n\n".join(f"[[BEAT {idx}]]\n{texts[idx]}" for idx in targets)
+            batch_prompt = f"""Fix embodiment and destination arc issues in these sleep story beats:
 
-CORRECTED VERSION:"""
+{numbered}
+
+{requirements}
+
+Return ONLY valid JSON of the form {{"corrections": [{{"idx": <beat number>, "text": "<corrected beat>"}}]}} with one entry per beat above."""
+            try:
+                r = await self.aclient.generate(
+                    model=self.orchestrator.reasoner_name,
+                    prompt=batch_prompt,
+                    format='json',
+                    # JSON mode: no stop sequences, they could cut the object short
+                    options={"temperature": 0.3, "num_predict": sum(_correction_budget(texts[idx]) + 16 for idx in targets)}
+                )
+                data = self._loads_json(r.get('response', ''), json_mode=True)
+                for item in data.get("corrections", []) if isinstance(data, dict) else []:
+                    if isinstance(item, dict) and item.get("idx") in targets:
+                        _apply(item["idx"], item.get("text"))
+            except Exception as e:
+                logger.warning("Batched beat correction failed: %s", e)
+        
+        # Single beat, or whatever the batch did not cover: per-beat calls, run concurrently
+        # but no wider than the server serves in parallel (extra requests would only queue there)
+        sem = asyncio.Semaphore(max(1, settings.OLLAMA_NUM_PARALLEL))
+        async def _fix_one(idx: int) -> None:
+            async with sem:
+                await _rewrite_one(idx)
+        
+        async def _rewrite_one(idx: int) -> None:
+            original_text = texts[idx]
+            correction_prompt = f"""Fix embodiment and destination arc issues in this sleep story beat:
 
-                try:
-                    def _call():
-                        return self.client.generate(
-                            model=self.orchestrator.reasoner_name,
-                            prompt=correction_prompt,
-                            options={"temperature": 0.3, "num_predict": 300}
-                        ).get('response', original_text)
-                    
-                    corrected = await asyncio.to_thread(_call)
-                    if corrected and len(corrected.split()) > 20:
-                        fixed_beats[idx]["text"] = corrected.strip()
-                        logger.info(f"Fixed embodiment issues in beat {idx}")
-                except Exception as e:
-                    logger.warning(f"Failed to fix beat {idx}: {e}")
-        
-        return fixed_beats
+ORIGINAL TEXT:
+{original_text}
+
+{requirements}
+
+CORRECTED VERSION:"""
+            try:
+                r = await self.aclient.generate(
+                    model=self.orchestrator.reasoner_name,
+                    prompt=correction_prompt,
+                    options={"temperature": 0.3, "num_predict": _correction_budget(original_text), "stop": _CORRECTION_STOP}
+                )
+                _apply(idx, r.get('response', original_text))
+            except Exception as e:
+                logger.warning("Failed to fix beat %d: %s", idx, e)
+        
+        await asyncio.gather(*[_fix_one(idx) for idx in targets if idx not in changed_idx])
+        
+        return fixed_beats, changed_idx
 
     # Helpers restored
     def _extract_beats_from_result(self, enhanced_result: Dict[str, Any]) -> List[Dict[str, Any]]:
         beats_schema = enhanced_result.get("beats_schema", {})
         if isinstance(beats_schema, dict) and "beats" in beats_schema:
-            return [{"text": b.get("text", "")} for b in beats_schema.get("beats", [])]
+            _get = dict.get
+            return [{"text": _get(b, "text", "")} for b in beats_schema.get("beats", [])]
         text = enhanced_result.get("story_text", "")
-        parts = [p.strip() for p in re.split(r"\n\n+", text) if p.strip()]
+        parts = [p for p in map(str.strip, _PARAGRAPH_SPLIT_RE.split(text)) if p]
         return [{"text": p} for p in parts] or [{"text": text}]
 
+    def _theme_prompt_params(self, theme: str, description: Optional[str]) -> Dict[str, Any]:
+        return {
+            'theme': theme,
+            'description': description or 'None',
+            'pov_mode': 'second_person' if self.generation_params.get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON) else 'flexible',
+            'sensory_coupling': self.generation_params.get('sensory_coupling', settings.SENSORY_COUPLING),
+            'movement_style': 'embodied_journey' if self.generation_params.get('movement_verbs_required', settings.MOVEMENT_VERBS_REQUIRED) > 0 else 'gentle_flow'
+        }
+
+    def _outline_prompt_params(self, duration: int) -> Dict[str, Any]:
+        return {
+            'duration': duration,
+            'target_words': duration * settings.TARGET_WPM,
+            'beats': settings.BEATS_PER_STORY,
+            'pov_enforce': self.generation_params.get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON),
+            'embodiment_level': self.generation_params.get('movement_verbs_required', settings.MOVEMENT_VERBS_REQUIRED),
+            'sensory_coupling': self.generation_params.get('sensory_coupling', settings.SENSORY_COUPLING),
+            'destination_required': self.generation_params.get('closure_required', settings.CLOSURE_REQUIRED)
+        }
+
+    def _theme_cache_key(self, theme: str, description: Optional[str]) -> Tuple[str, tuple]:
+        # Normalized so case/spacing/punctuation variants share an exact-hit entry; prompts keep the original text.
+        # The theme goes in the fingerprint, which must match exactly: only the description may match semantically.
+        return _normalize_theme(description or ''), self._cache_fingerprint(_normalize_theme(theme))
+
+    def _outline_cache_key(self, theme_json: bytes, duration: int) -> Tuple[str, tuple]:
+        # Outlines only hit on an identical theme dict (plus parameters), keyed by the hash of its sorted JSON
+        return hashlib.sha256(theme_json).hexdigest(), self._cache_fingerprint(duration)
+
+    def _cached_theme(self, theme: str, description: Optional[str]) -> Optional[Dict[str, Any]]:
+        return theme_outline_cache.get('theme', *self._theme_cache_key(theme, description))
+
+    async def _analyze_and_outline_unified(self, theme: str, description: Optional[str], duration: int) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Theme analysis and outline in a single generator call.
+
+        Returns None when the response lacks a usable theme or outline, in
+        which case the caller falls back to the two separate calls.
+        """
+        params = self._outline_prompt_params(duration)
+        params.update(self._theme_prompt_params(theme, description))
+        prompt = render_unified_theme_outline_prompt(**params)
+        data = await self._generate_json(
+            prompt,
+            options={'temperature': 0.6, 'num_predict': 800 + settings.MAX_TOKENS_OUTLINE},
+            retry_options={'temperature': 0.3, 'num_predict': 400 + settings.MAX_TOKENS_OUTLINE}
+        )
+        enriched_theme = (data or {}).get('enriched_theme')
+        outline = (data or {}).get('outline')
+        if (not isinstance(enriched_theme, dict) or not _REQUIRED_THEME_FIELDS.issubset(enriched_theme)
+                or not isinstance(outline, dict) or not outline.get('acts')):
+            logger.warning("Unified theme/outline response incomplete, falling back to separate calls")
+            return None
+        if 'spatial_waypoints' not in enriched_theme:
+            enriched_theme['spatial_waypoints'] = list(_DEFAULT_WAYPOINTS)
+        theme_outline_cache.put('theme', *self._theme_cache_key(theme, description), enriched_theme)
+        theme_outline_cache.put('outline', *self._outline_cache_key(orjson.dumps(enriched_theme, option=orjson.OPT_SORT_KEYS), duration), outline, semantic=False)
+        return enriched_theme, outline
+
     async def _analyze_theme_enhanced(self, theme: str, description: Optional[str]) -> Dict[str, Any]:
+        cache_text, fingerprint = self._theme_cache_key(theme, description)
+        cached = theme_outline_cache.get('theme', cache_text, fingerprint)
+        if cached is not None:
+            return cached
+        
         # Include generation parameters in analysis
-        prompt = THEME_ANALYSIS_PROMPT.format(
-            theme=theme, 
-            description=description or 'None',
-            pov_mode='second_person' if self.generation_params.get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON) else 'flexible',
-            sensory_coupling=self.generation_params.get('sensory_coupling', settings.SENSORY_COUPLING),
-            movement_style='embodied_journey' if self.generation_params.get('movement_verbs_required', settings.MOVEMENT_VERBS_REQUIRED) > 0 else 'gentle_flow'
+        prompt = render_theme_analysis_prompt(**self._theme_prompt_params(theme, description))
+        data = await self._generate_json(
+            prompt,
+            options={'temperature': 0.7, 'num_predict': 800},
+            retry_options={'temperature': 0.3, 'num_predict': 400}
         )
-        def _call():
-            r = self.client.generate(model=self.orchestrator.generator_name, prompt=prompt, options={'temperature': 0.7, 'num_predict': 800})
-            return r.get('response','')
-        text = await asyncio.to_thread(_call)
-        json_text = self._extract_json(text)
-        try:
-            data = json.loads(json_text) if json_text else {}
-            if 'spatial_waypoints' not in data:
-                data['spatial_waypoints'] = ['entry path','gentle bend','small clearing','wooden bridge','soft moss hollow']
-            return data
-        except Exception:
-            return {"setting": theme, "sensory_elements": ["sight","sound"], "spatial_waypoints": ['entry path','gentle bend','small clearing','wooden bridge','soft moss hollow']}
+        if data is None:
+            return {"setting": theme, "sensory_elements": list(_FALLBACK_SENSORY_ELEMENTS), "spatial_waypoints": list(_DEFAULT_WAYPOINTS)}
+        if 'spatial_waypoints' not in data:
+            data['spatial_waypoints'] = list(_DEFAULT_WAYPOINTS)
+        theme_outline_cache.put('theme', cache_text, fingerprint, data)
+        return data
 
     async def _generate_outline_enhanced(self, enriched_theme: Dict[str, Any], duration: int, custom_waypoints: Optional[List[str]]) -> Dict[str, Any]:
-        target_words = duration * settings.TARGET_WPM
+        # Serialized once: the same sorted JSON is the cache key source and the prompt payload
+        theme_json = orjson.dumps(enriched_theme, option=orjson.OPT_SORT_KEYS)
+        cache_text, fingerprint = self._outline_cache_key(theme_json, duration)
+        cached = theme_outline_cache.get('outline', cache_text, fingerprint, semantic=False)
+        if cached is not None:
+            return cached
         
         # Include generation parameters in outline
-        prompt = OUTLINE_GENERATION_PROMPT.format(
-            theme=json.dumps(enriched_theme), 
-            duration=duration, 
-            target_words=target_words, 
-            beats=settings.BEATS_PER_STORY,
-            pov_enforce=self.generation_params.get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON),
-            embodiment_level=self.generation_params.get('movement_verbs_required', settings.MOVEMENT_VERBS_REQUIRED),
-            sensory_coupling=self.generation_params.get('sensory_coupling', settings.SENSORY_COUPLING),
-            destination_required=self.generation_params.get('closure_required', settings.CLOSURE_REQUIRED)
+        prompt = render_outline_generation_prompt(
+            theme=theme_json.decode(),
+            **self._outline_prompt_params(duration)
+        )
+        outline = await self._generate_json(
+            prompt,
+            options={'temperature': 0.6, 'num_predict': settings.MAX_TOKENS_OUTLINE},
+            retry_options={'temperature': 0.3, 'num_predict': settings.MAX_TOKENS_OUTLINE}
         )
-        def _call():
-            r = self.client.generate(model=self.orchestrator.generator_name, prompt=prompt, options={'temperature': 0.6, 'num_predict': settings.MAX_TOKENS_OUTLINE})
-            return r.get('response','')
-        text = await asyncio.to_thread(_call)
-        json_text = self._extract_json(text)
-        try:
-            outline = json.loads(json_text) if json_text else {}
-            return outline or {"story_bible": {"setting": enriched_theme.get('setting','')}, "acts": []}
-        except Exception:
+        if outline is None:
             return {"story_bible": {"setting": enriched_theme.get('setting','')}, "acts": []}
+        theme_outline_cache.put('outline', cache_text, fingerprint, outline, semantic=False)
+        return outline
 
-    def _create_base_prompt(self, enriched_theme: Dict, outline: Dict) -> str:
-        # Include generation parameters in base prompt
+    def _cache_fingerprint(self, *extra: Any) -> tuple:
+        """Parameters a cached theme/outline must match exactly to be reused."""
+        params = self.generation_params
+        return (
+            self.generator_name,
+            THEME_OUTLINE_PROMPT_VERSION,
+            params.get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON),
+            params.get('movement_verbs_required', settings.MOVEMENT_VERBS_REQUIRED),
+            params.get('sensory_coupling', settings.SENSORY_COUPLING),
+            params.get('closure_required', settings.CLOSURE_REQUIRED),
+            *extra
+        )
+
+    async def _generate_json(self, prompt: str, options: Dict[str, Any], retry_options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Generate a JSON object with the generator model.
+
+        Both attempts run in Ollama JSON mode (grammar-constrained), so the
+        reply is parsed as-is; _extract_json only remains as a fallback for
+        servers or models that ignore the format. If the first reply does not
+        parse, the prompt is retried once with retry_options. Returns None
+        when both attempts fail to parse.
+
+        Responses are streamed: once the first balanced object has arrived and
+        parses, the stream is closed so Ollama stops generating; JSON mode can
+        otherwise keep emitting whitespace up to num_predict.
+        """
+        for attempt in range(2):
+            opts = retry_options if attempt else options
+            stream = await self.aclient.generate(model=self.orchestrator.generator_name, prompt=prompt, options=opts, stream=True, format='json')
+            scanner = _JsonObjectScanner()
+            try:
+                async for chunk in stream:
+                    candidate = scanner.feed(chunk.get('response', ''))
+                    if candidate is not None:
+                        try:
+                            data = orjson.loads(candidate)
+                        except orjson.JSONDecodeError:
+                            continue
+                        if isinstance(data, dict) and data:
+                            return data
+            finally:
+                aclose = getattr(stream, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
+            try:
+                data = self._loads_json(scanner.text, json_mode=True)
+            except Exception as e:
+                logger.warning("JSON parse failed on attempt %d: %s", attempt + 1, e)
+                continue
+            if isinstance(data, dict) and data:
+                return data
+        return None
+
+    def _build_base_prompt_prefix(self) -> str:
+        """Static part of the base prompt: depends only on generation_params, so it is rendered once."""
         param_instructions = []
         
         if self.generation_params.get('pov_enforce_second_person', settings.POV_ENFORCE_SECOND_PERSON):
@@ -299,51 +597,93 @@ CORRECTED VERSION:"""
         
         param_text = "\n".join(param_instructions) if param_instructions else "Follow natural storytelling flow."
         
-        return f"""Generate a soothing sleep story based on this enhanced theme and outline.
+        return f"""Generate a soothing sleep story based on the enhanced theme and outline below.
 
-ENRICHED THEME:
-{json.dumps(enriched_theme, indent=2)}
-
-STORY OUTLINE:
-{json.dumps(outline, indent=2)}
+Create a calming, immersive narrative that guides the listener toward sleep. Focus on gentle pacing, vivid but peaceful imagery, smooth transitions.
 
 GENERATION PARAMETERS:
 {param_text}
 
-Create a calming, immersive narrative that guides the listener toward sleep. Focus on gentle pacing, vivid but peaceful imagery, smooth transitions."""
+"""
 
-    def _final_polish(self, story: str) -> str:
-        lines = [line.strip() for line in story.split('\n') if line.strip()]
-        polished = '\n\n'.join(lines)
-        polished = re.sub(r'\[PAUSE:\d+\.\d+\]', '', polished)
-        polished = re.sub(r'\[BREATHE\]', '', polished)
-        return polished
+    def _create_base_prompt(self, enriched_theme: Dict, outline: Dict) -> str:
+        # Fixed instructions first, per-story data last, so identical prefixes hit Ollama's prompt cache
+        return f"""{self._base_prompt_prefix}ENRICHED THEME:
+{orjson.dumps(enriched_theme, option=orjson.OPT_INDENT_2).decode()}
+
+STORY OUTLINE:
+{orjson.dumps(outline, option=orjson.OPT_INDENT_2).decode()}"""
+
+    def _finalize_story(self, texts: List[str], polish: bool) -> Tuple[str, int]:
+        """Join beat texts into the final story and count its words in the same walk.
+
+        Polishing drops blank lines, strips every line and re-spaces paragraphs
+        with blank lines, then removes TTS markers. Beats that are already a
+        single clean, marker-free line each are joined directly.
+        """
+        if polish and all(t and '\n' not in t and '[' not in t and t == t.strip() for t in texts):
+            polish = False
+        if not polish:
+            story = "\n\n".join(texts)
+            return story, sum(len(t.split()) for t in texts)
+        lines: List[str] = []
+        words = 0
+        for text in texts:
+            for line in text.split('\n'):
+                line = line.strip()
+                if line:
+                    lines.append(line)
+                    words += len(line.split())
+        story = '\n\n'.join(lines)
+        if '[' in story:
+            # Marker removal can merge or drop words, so recount only in that case
+            story = _TTS_MARKER_RE.sub('', story)
+            words = len(story.split())
+        return story, words
+
+    def _loads_json(self, text: str, json_mode: bool = False) -> Any:
+        """Parse an LLM response; JSON-mode output is tried as-is before scanning for an object."""
+        if json_mode:
+            try:
+                return orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass
+        return orjson.loads(self._extract_json(text))
 
     def _extract_json(self, text: str) -> str:
-        json_marker = '```json'; code_marker = '```'
-        if json_marker in text:
-            start = text.find(json_marker) + len(json_marker)
-            end = text.find(code_marker, start)
-            if end > start: return text[start:end].strip()
-        if code_marker in text:
-            start = text.find(code_marker) + len(code_marker)
-            end = text.find(code_marker, start)
-            if end > start:
-                candidate = text[start:end].strip()
-                if candidate.startswith('{'): return candidate
-        m = re.search(r'\{[\s\S]*\}', text)
-        return m.group(0) if m else '{}'
+        """Return the first balanced JSON object, looking after a ```json fence if there is one.
+
+        One left-to-right pass over the structural characters only, tracking
+        string/escape state so braces inside values do not count; trailing
+        prose after the object is never scanned.
+        """
+        fence = text.find('```json')
+        begin = text.find('{', fence + 7 if fence != -1 else 0)
+        if begin == -1:
+            return '{}'
+        depth = 0
+        in_str = False
+        skip_to = -1
+        for m in _JSON_STRUCT_RE.finditer(text, begin):
+            i = m.start()
+            if i < skip_to:
+                continue
+            ch = m.group()
+            if in_str:
+                if ch == '\\':
+                    skip_to = i + 2
+                elif ch == '"':
+                    in_str = False
+            elif ch == '"':
+                in_str = True
+            elif ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    return text[begin:i + 1]
+        return text[begin:]
 
     def _setup_destination_promise(self, enriched_theme: Dict[str, Any], outline: Dict[str, Any]) -> Dict[str, Any]:
-        archetypes = getattr(settings, 'DESTINATION_ARCHETYPES', {
-            'safe_shelter': ['cottage','cabin','sanctuary','grove'],
-            'peaceful_vista': ['meadow','clearing','overlook','garden'],
-            'restorative_water': ['pool','stream','cove','spring'],
-            'sacred_space': ['temple','circle','altar','threshold']
-        })
-        try:
-            first_key = next(iter(archetypes))
-            name = archetypes[first_key][0]
-        except Exception:
-            name = 'grove'
-        return {'name': name, 'promise': 'a safe, soft place to rest', 'appeal': 'warmth, protection, quiet'}
\ No newline at end of file
+        # Independent of theme and outline for now; return a copy so callers may annotate it
+        return dict(_DEFAULT_DESTINATION_CTX)
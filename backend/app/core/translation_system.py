@@ -1,53 +1,236 @@
-import ollama
 import re
 import asyncio
-from typing import List, Dict, Optional, Tuple
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Dict, Optional, Tuple
 import logging
+
+import ollama
+import orjson
+
 from app.core.config import settings
+from app.core.ollama_client import new_async_client
 
 logger = logging.getLogger(__name__)
 
+# Pace-preserving patterns for Italian translation
+# (comma spacing is normalized by the final ", " pass in _apply_pace_preservation)
+PACE_PATTERNS = {
+    # Breathing spaces
+    r'\s+and\s+': ' e ',
+    r'\s+but\s+': ' ma ',
+    r'\s+or\s+': ' o ',
+    # Soft transitions
+    r'\bgently\b': 'dolcemente',
+    r'\bslowly\b': 'lentamente',
+    r'\bquietly\b': 'silenziosamente',
+    r'\bsoftly\b': 'soavemente'
+}
+
+# Italian sleep story vocabulary optimization
+SLEEP_VOCABULARY = {
+    'breathe': 'respira',
+    'relax': 'rilassati',
+    'peaceful': 'pacifico',
+    'gentle': 'dolce',
+    'calm': 'calma',
+    'serenity': 'serenità',
+    'tranquil': 'tranquillo',
+    'whisper': 'sussurro',
+    'embrace': 'abbraccio',
+    'warm': 'tiepido',
+    'soft': 'morbido',
+    'flowing': 'che scorre',
+    'distant': 'lontano',
+    'horizon': 'orizzonte'
+}
+
+# Basic word replacement for critical sleep story terms
+EMERGENCY_DICT = {
+    'you': 'tu',
+    'your': 'il tuo',
+    'the': 'il',
+    'and': 'e',
+    'are': 'sei',
+    'is': 'è',
+    'water': 'acqua',
+    'light': 'luce',
+    'wind': 'vento',
+    'tree': 'albero',
+    'sky': 'cielo',
+    'sun': 'sole',
+    'moon': 'luna'
+}
+
+# Post-processing runs on every translation: compile the patterns once at import
+# Each (guard, pattern, replacement) pass is skipped when its guard substring is absent:
+# a plain `in` scan is far cheaper than starting the regex engine for nothing.
+# Every pace pattern is one word framed by \s+ or \b, and that word is its guard
+_PACE_RES = tuple((re.sub(r'\\[sb]\+?', '', pattern), re.compile(pattern), replacement)
+                  for pattern, replacement in PACE_PATTERNS.items())
+
+def _estimate_words(text: str) -> int:
+    """Word count for token budgets, counting separators instead of building a split() list.
+
+    Exact for single-spaced text; runs of whitespace over-count, which only loosens a budget.
+    """
+    return text.count(' ') + text.count('\n') + 1 if text else 0
+
+def _word_replacer(table: Dict[str, str]) -> Callable[[str], str]:
+    """Replace every whole-word key of table (case-insensitively) in a single pass.
+
+    One alternation instead of a re.sub per key. Each key has its own group, so
+    the replacement is picked by m.lastindex without case-folding the match.
+    No replacement contains a key, so this equals applying the keys in turn.
+    """
+    # Word boundaries avoid partial matches
+    pattern = re.compile(r'\b(?:' + '|'.join(f'({re.escape(k)})' for k in table) + r')\b', re.IGNORECASE)
+    replacements = (None, *table.values())
+    return functools.partial(pattern.sub, lambda m: replacements[m.lastindex])
+
+_replace_sleep_vocabulary = _word_replacer(SLEEP_VOCABULARY)
+_replace_emergency_words = _word_replacer(EMERGENCY_DICT)
+
+_ARTIFACT_RES = (
+    # Translation prompts that sometimes leak through, at the start of each chunk of the joined text
+    (':', re.compile(r'(?:\A|(?<=\n\n))(Italian translation:|Traduzione italiana:)\s*', re.IGNORECASE), ''),
+    (':', re.compile(r'(?:\A|(?<=\n\n))(Translation:|Traduzione:)\s*', re.IGNORECASE), ''),
+    # Common over-translations; [ \t] so a match never joins two chunks across their "\n\n"
+    ('tanto', re.compile(r'\btanto[ \t]+tanto\b'), 'molto'),  # "so so" -> "very"
+    ('molto', re.compile(r'\bmolto[ \t]+molto\b'), 'estremamente'),
+    # Italian flow
+    ('e', re.compile(r'\be[ \t]+e\b'), 'e'),  # Remove double "and"
+    ('il', re.compile(r'\bil[ \t]+il\b'), 'il'),  # Remove double articles
+)
+
+# Chunk translation prompts: fixed text first and the chunk last, so every request
+# shares the same prefix (and Ollama can reuse its cached prompt state)
+_HQ_PROMPT_PREFIX = """You are a professional translator specializing in sleep stories and meditation content.
+
+Translate this English text to Italian while preserving:
+1. The EXACT same pacing and rhythm (pauses, ellipses, breathing spaces)
+2. Poetic and soothing language suitable for relaxation
+3. Natural Italian flow without being too literal
+4. All punctuation that creates pauses (..., commas, periods)
+
+IMPORTANT: Maintain the same sentence structure and length to preserve the calming rhythm.
+
+English text:
+"""
+_HQ_PROMPT_SUFFIX = """
+
+Italian translation:"""
+_FAST_PROMPT_PREFIX = "Translate to Italian (keep same pacing): "
+
+# Streamed pieces between progress reports while a chunk is translated
+_PROGRESS_EVERY_CHUNKS = 32
+
+# Chunks shorter than this (chars) use the fast prompt even in high-quality mode,
+# and several of them are translated together, up to _BATCH_MAX_CHUNKS per call
+_FAST_MODE_MAX_CHARS = 200
+_BATCH_MAX_CHUNKS = 4
+
+# Chunk sizing against the model context: prompt instructions plus margin, and ~4 chars per token
+_PROMPT_RESERVE_TOKENS = 256
+_CHARS_PER_TOKEN = 4
+
+def _max_chunk_chars(num_ctx: int) -> int:
+    """Largest chunk (chars) whose prompt and translation both fit in num_ctx tokens.
+
+    num_predict is twice the chunk's words, about 1.5x its tokens, so the chunk
+    gets 1/2.5 of what the prompt reserve leaves.
+    """
+    return max(_FAST_MODE_MAX_CHARS, int((num_ctx - _PROMPT_RESERVE_TOKENS) / 2.5) * _CHARS_PER_TOKEN)
+
+_MAX_CHUNK_CHARS = _max_chunk_chars(settings.TRANSLATION_NUM_CTX)
+
+# Spaced ellipsis -> ' ... ', or ellipsis glued to a letter -> '... ': one pass for both.
+# The first alternative always ends on whitespace, so neither can feed the other
+_ELLIPSIS_RE = re.compile(r'\s+\.\.\.\s+|\.\.\.(?=[a-zA-Z])')
+_COMMA_SPACING_RE = re.compile(r'\s*,\s*')
+_SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([.,;])')
+_SENTENCE_START_RE = re.compile(r'\. +([a-z])')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+class TranslationCache:
+    """Bounded LRU of translated chunks, shared by all TranslationSystem instances.
+
+    Keys are blake2b digests of (model, mode, chunk), so the stored keys stay small
+    however long the chunk. Jobs translate on their own threads, hence the lock.
+    Only non-empty model translations are stored, never the emergency fallback.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, mode: str, chunk: str) -> str:
+        return hashlib.blake2b(f"{model}\0{mode}\0{chunk}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        if not value.strip():
+            return  # an empty reply is a failed translation, not one worth replaying
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def load(self, path: str) -> None:
+        """Load entries saved by save(); a missing or unreadable file leaves the cache empty."""
+        try:
+            with open(path, "rb") as f:
+                data = orjson.loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning("Translation cache at %s unreadable, starting empty: %s", path, e)
+            return
+        with self._lock:
+            # Saved oldest first; keep the most recent max_entries
+            for key, value in list(data.items())[-self.max_entries:]:
+                if isinstance(value, str) and value.strip():
+                    self._entries[key] = value
+            loaded = len(self._entries)
+        logger.info("Loaded %d cached chunk translations", loaded)
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            data = orjson.dumps(dict(self._entries))
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Failed to save translation cache to %s: %s", path, e)
+
+
+translation_cache = TranslationCache(max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES)
+
+
 class TranslationSystem:
     """High-quality English->Italian translation system optimized for sleep stories"""
     
     def __init__(self, quality_mode: str = "high"):
-        self.client = ollama.Client(host=settings.OLLAMA_URL)
+        # Async so chunks can be translated concurrently; opened and closed around each
+        # translate_story_with_pace_preservation call, on the loop that runs it
+        self.aclient: Optional[ollama.AsyncClient] = None
         self.quality_mode = quality_mode  # "high" or "fast"
-        self.translation_cache = {}  # Cache for common phrases
-        
-        # Pace-preserving patterns for Italian translation
-        self.pace_patterns = {
-            # Ellipses and pauses
-            r'\.\.\.': '...',
-            r'\,\s+': ', ',
-            # Breathing spaces
-            r'\s+and\s+': ' e ',
-            r'\s+but\s+': ' ma ',
-            r'\s+or\s+': ' o ',
-            # Soft transitions
-            r'\bgently\b': 'dolcemente',
-            r'\bslowly\b': 'lentamente', 
-            r'\bquietly\b': 'silenziosamente',
-            r'\bsoftly\b': 'soavemente'
-        }
-        
-        # Italian sleep story vocabulary optimization
-        self.sleep_vocabulary = {
-            'breathe': 'respira',
-            'relax': 'rilassati',
-            'peaceful': 'pacifico',
-            'gentle': 'dolce',
-            'calm': 'calma',
-            'serenity': 'serenità',
-            'tranquil': 'tranquillo',
-            'whisper': 'sussurro',
-            'embrace': 'abbraccio',
-            'warm': 'tiepido',
-            'soft': 'morbido',
-            'flowing': 'che scorre',
-            'distant': 'lontano',
-            'horizon': 'orizzonte'
-        }
+        self.translation_cache = translation_cache  # Process-wide, survives across jobs
     
     async def translate_story_with_pace_preservation(
         self, 
@@ -56,34 +239,97 @@ class TranslationSystem:
     ) -> Dict[str, any]:
         """Translate full story while preserving pace and flow"""
         
+        self.aclient, transport = new_async_client()
+        try:
+            return await self._translate_story(english_text, update_callback)
+        finally:
+            await transport.aclose()
+    
+    async def _translate_story(self, english_text: str, update_callback: Optional) -> Dict[str, any]:
         logger.info(f"Starting translation - mode: {self.quality_mode}")
         
         # Split into manageable chunks (preserve paragraph structure)
-        chunks = self._split_into_chunks(english_text)
-        translated_chunks = []
-        
+        chunks = self._split_into_chunks(english_text, _MAX_CHUNK_CHARS)
         total_chunks = len(chunks)
-        
-        for i, chunk in enumerate(chunks):
-            if update_callback:
-                progress = 75 + (20 * i / total_chunks)  # Translation happens 75-95%
-                step = f"Translating chunk {i+1}/{total_chunks}..."
-                update_callback(progress, step, 7)
-            
-            translated_chunk = await self._translate_chunk_high_quality(chunk)
-            translated_chunks.append(translated_chunk)
-            
-            # Small delay to prevent overloading Ollama
-            await asyncio.sleep(0.1)
+        translated_chunks: List[str] = [""] * total_chunks
+        
+        # At most OLLAMA_NUM_PARALLEL chunks in flight: more would only queue server-side,
+        # and each extra parallel slot costs Ollama its own context buffer
+        sem = asyncio.Semaphore(max(1, settings.OLLAMA_NUM_PARALLEL))
+        # Share of its token budget each in-flight chunk has streamed so far
+        partial = [0.0] * total_chunks
+        done = 0
+        
+        def _progress_for(i: int, chunk: str) -> Optional[Callable[[int], None]]:
+            if not update_callback:
+                return None
+            budget = _estimate_words(chunk) * 2
+            def on_progress(pieces: int) -> None:
+                partial[i] = min(0.95, pieces / budget)
+                update_callback(75 + (20 * (done + sum(partial)) / total_chunks), f"Translating chunk {i + 1}/{total_chunks}...", 7)
+            return on_progress
+        
+        async def _translate(i: int, chunk: str, mode: str) -> List[Tuple[int, str]]:
+            # Repeated boilerplate (intros, breathing cues, closings) skips the model entirely
+            cached = self.translation_cache.get(TranslationCache.key(settings.MODEL_NAME, mode, chunk))
+            if cached is not None:
+                return [(i, cached)]
+            async with sem:
+                if mode == "fast":
+                    return [(i, await self._translate_chunk_fast(chunk, _progress_for(i, chunk)))]
+                return [(i, await self._translate_chunk_high_quality(chunk, _progress_for(i, chunk)))]
+        
+        async def _translate_batch(batch: List[int]) -> List[Tuple[int, str]]:
+            # Uncached short chunks share one call; whatever it misses goes through _translate
+            missing: List[int] = []
+            results: List[Tuple[int, str]] = []
+            for i in batch:
+                cached = self.translation_cache.get(TranslationCache.key(settings.MODEL_NAME, "fast", chunks[i]))
+                if cached is None:
+                    missing.append(i)
+                else:
+                    results.append((i, cached))
+            batched: List[Optional[str]] = [None] * len(missing)
+            if len(missing) > 1:
+                async with sem:
+                    batched = await self._translate_chunks_batched([chunks[i] for i in missing])
+            for i, translated in zip(missing, batched):
+                results.extend([(i, translated)] if translated is not None else await _translate(i, chunks[i], "fast"))
+            return results
+        
+        # Short chunks go through the short prompt: the high-quality boilerplate would
+        # outweigh them. Tasks start (and take the semaphore) in creation order, so
+        # same-mode chunks reach Ollama back to back with prompts of similar length
+        modes = [self._chunk_mode(chunk) for chunk in chunks]
+        order = sorted(range(total_chunks), key=lambda i: modes[i] != "fast")
+        # Several short chunks: up to _BATCH_MAX_CHUNKS per call, so they share one prompt and round trip
+        short = [i for i in order if len(chunks[i]) < _FAST_MODE_MAX_CHARS]
+        batches = [short[k:k + _BATCH_MAX_CHUNKS] for k in range(0, len(short), _BATCH_MAX_CHUNKS)] if len(short) > 1 else []
+        in_batch = {i for batch in batches for i in batch}
+        tasks = [asyncio.create_task(_translate_batch(batch)) for batch in batches]
+        tasks += [asyncio.create_task(_translate(i, chunks[i], modes[i])) for i in order if i not in in_batch]
+        
+        # Progress is reported per completed chunk, translation happens 75-95%
+        if update_callback:
+            update_callback(75, f"Translating {total_chunks} chunks...", 7)
+        for next_done in asyncio.as_completed(tasks):
+            for i, text in await next_done:
+                translated_chunks[i] = text
+                partial[i] = 0.0
+                done += 1
+                if update_callback:
+                    update_callback(75 + (20 * done / total_chunks), f"Translated chunk {done}/{total_chunks}...", 7)
         
         # Join and apply final pace adjustments
         italian_text = "\n\n".join(translated_chunks)
+        # Artifact cleanup runs once over the joined text rather than per chunk
+        italian_text = self._clean_translation_artifacts(italian_text)
         italian_text = self._apply_pace_preservation(italian_text)
         italian_text = self._final_italian_polish(italian_text)
         
         # Calculate metrics
         english_words = len(english_text.split())
-        italian_words = len(italian_text.split())
+        italian_words = _estimate_words(italian_text)  # exact: the polish leaves single spaces only
         pace_ratio = italian_words / english_words if english_words > 0 else 1.0
         
         return {
@@ -102,81 +348,114 @@ class TranslationSystem:
         """Split text into chunks while preserving paragraph boundaries"""
         paragraphs = text.split('\n\n')
         chunks = []
-        current_chunk = ""
+        # Paragraphs of the current chunk, joined only when it is emitted; current_len
+        # tracks the joined length so the size check never rebuilds the string
+        current: List[str] = []
+        current_len = 0
         
         for paragraph in paragraphs:
             # If adding this paragraph would exceed limit, save current chunk
-            if len(current_chunk) + len(paragraph) > max_chunk_size and current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = paragraph
+            if current_len + len(paragraph) > max_chunk_size and current_len:
+                chunks.append("\n\n".join(current).strip())
+                current = [paragraph]
+                current_len = len(paragraph)
+            elif current_len:
+                current.append(paragraph)
+                current_len += 2 + len(paragraph)
             else:
-                if current_chunk:
-                    current_chunk += "\n\n" + paragraph
-                else:
-                    current_chunk = paragraph
+                current = [paragraph]
+                current_len = len(paragraph)
         
         # Add remaining chunk
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        last_chunk = "\n\n".join(current).strip()
+        if last_chunk:
+            chunks.append(last_chunk)
         
         return chunks
     
-    async def _translate_chunk_high_quality(self, chunk: str) -> str:
+    def _chunk_mode(self, chunk: str) -> str:
+        """Translation mode for one chunk: fast for short chunks, else the configured mode"""
+        return "fast" if len(chunk) < _FAST_MODE_MAX_CHARS else self.quality_mode
+    
+    async def _generate_streamed(self, prompt: str, options: Dict, on_progress: Optional[Callable[[int], None]] = None) -> str:
+        """Generate with MODEL_NAME, streamed so progress can be reported while the chunk is translated"""
+        parts: List[str] = []
+        async for part in await self.aclient.generate(model=settings.MODEL_NAME, prompt=prompt, options=options, stream=True):
+            parts.append(part['response'])
+            if on_progress is not None and len(parts) % _PROGRESS_EVERY_CHUNKS == 0:
+                on_progress(len(parts))
+        return "".join(parts).strip()
+    
+    async def _translate_chunks_batched(self, chunks: List[str]) -> List[Optional[str]]:
+        """Translate several short chunks in one JSON-mode call.
+
+        Returns translations aligned with chunks; None where the reply had no usable entry.
+        """
+        numbered = "\n\n".join(f"[[TEXT {n}]]\n{chunk}" for n, chunk in enumerate(chunks))
+        prompt = f"""Translate each numbered English text to Italian (keep same pacing and punctuation):
+
+{numbered}
+
+Return ONLY valid JSON of the form {{"translations": [{{"idx": <text number>, "text": "<Italian translation>"}}]}} with one entry per text above."""
+        translations: List[Optional[str]] = [None] * len(chunks)
+        try:
+            response = await self.aclient.generate(
+                model=settings.MODEL_NAME,
+                prompt=prompt,
+                format='json',
+                options={'temperature': 0.2, 'num_predict': sum(_estimate_words(chunk) * 2 + 16 for chunk in chunks)}
+            )
+            data = orjson.loads(response['response'])
+        except Exception as e:
+            logger.warning("Batched translation failed, translating chunks one by one: %s", e)
+            return translations
+        for item in data.get("translations", []) if isinstance(data, dict) else []:
+            if not isinstance(item, dict):
+                continue
+            idx, text = item.get("idx"), item.get("text")
+            if isinstance(idx, int) and 0 <= idx < len(chunks) and isinstance(text, str) and text.strip():
+                translations[idx] = text.strip()
+                self.translation_cache.put(TranslationCache.key(settings.MODEL_NAME, "fast", chunks[idx]), translations[idx])
+        return translations
+    
+    async def _translate_chunk_high_quality(self, chunk: str, on_progress: Optional[Callable[[int], None]] = None) -> str:
         """High-quality translation of a single chunk"""
         
         if self.quality_mode == "fast":
-            return await self._translate_chunk_fast(chunk)
+            return await self._translate_chunk_fast(chunk, on_progress)
         
         # High-quality mode with context and style preservation
-        prompt = f"""You are a professional translator specializing in sleep stories and meditation content.
-
-Translate this English text to Italian while preserving:
-1. The EXACT same pacing and rhythm (pauses, ellipses, breathing spaces)
-2. Poetic and soothing language suitable for relaxation
-3. Natural Italian flow without being too literal
-4. All punctuation that creates pauses (..., commas, periods)
-
-IMPORTANT: Maintain the same sentence structure and length to preserve the calming rhythm.
-
-English text:
-{chunk}
-
-Italian translation:"""
+        prompt = _HQ_PROMPT_PREFIX + chunk + _HQ_PROMPT_SUFFIX
 
         try:
-            response = self.client.generate(
-                model=settings.MODEL_NAME,
-                prompt=prompt,
-                options={
+            translated = await self._generate_streamed(
+                prompt,
+                {
                     'temperature': 0.3,  # Lower temperature for consistency
-                    'num_predict': len(chunk.split()) * 2
-                }
+                    'num_predict': _estimate_words(chunk) * 2
+                },
+                on_progress
             )
-            
-            translated = response['response'].strip()
-            
-            # Clean up common translation artifacts
-            translated = self._clean_translation_artifacts(translated)
-            
+            self.translation_cache.put(TranslationCache.key(settings.MODEL_NAME, "high", chunk), translated)
             return translated
             
         except Exception as e:
             logger.warning(f"High-quality translation failed, falling back: {e}")
-            return await self._translate_chunk_fast(chunk)
+            return await self._translate_chunk_fast(chunk, on_progress)
     
-    async def _translate_chunk_fast(self, chunk: str) -> str:
+    async def _translate_chunk_fast(self, chunk: str, on_progress: Optional[Callable[[int], None]] = None) -> str:
         """Fast translation for when high-quality fails or fast mode is selected"""
         
-        prompt = f"Translate to Italian (keep same pacing): {chunk}"
+        prompt = _FAST_PROMPT_PREFIX + chunk
         
         try:
-            response = self.client.generate(
-                model=settings.MODEL_NAME,
-                prompt=prompt,
-                options={'temperature': 0.2, 'num_predict': len(chunk.split()) * 2}
+            translated = await self._generate_streamed(
+                prompt,
+                {'temperature': 0.2, 'num_predict': _estimate_words(chunk) * 2},
+                on_progress
             )
-            
-            return response['response'].strip()
+            self.translation_cache.put(TranslationCache.key(settings.MODEL_NAME, "fast", chunk), translated)
+            return translated
             
         except Exception as e:
             logger.error(f"Fast translation failed: {e}")
@@ -186,32 +465,26 @@ Italian translation:"""
     def _clean_translation_artifacts(self, text: str) -> str:
         """Remove common translation artifacts and improve flow"""
         
-        # Remove translation prompts that sometimes leak through
-        text = re.sub(r'^(Italian translation:|Traduzione italiana:)\s*', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'^(Translation:|Traduzione:)\s*', '', text, flags=re.IGNORECASE)
-        
-        # Fix common over-translations
-        text = re.sub(r'\btanto\s+tanto\b', 'molto', text)  # "so so" -> "very"
-        text = re.sub(r'\bmolto\s+molto\b', 'estremamente', text)
-        
-        # Improve Italian flow
-        text = re.sub(r'\be\s+e\b', 'e', text)  # Remove double "and"
-        text = re.sub(r'\bil\s+il\b', 'il', text)  # Remove double articles
+        for guard, pattern, replacement in _ARTIFACT_RES:
+            if guard in text:
+                text = pattern.sub(replacement, text)
         
         return text.strip()
     
     def _apply_pace_preservation(self, text: str) -> str:
         """Apply pace-preserving patterns to maintain rhythm"""
         
-        for pattern, replacement in self.pace_patterns.items():
-            text = re.sub(pattern, replacement, text)
+        for guard, pattern, replacement in _PACE_RES:
+            if guard in text:
+                text = pattern.sub(replacement, text)
         
         # Preserve ellipses spacing
-        text = re.sub(r'\s+\.\.\.\s+', ' ... ', text)
-        text = re.sub(r'\.\.\.([a-zA-Z])', r'... \1', text)
+        if '...' in text:
+            text = _ELLIPSIS_RE.sub(lambda m: '... ' if m.group()[0] == '.' else ' ... ', text)
         
         # Ensure proper spacing around commas (Italian style)
-        text = re.sub(r'\s*,\s*', ', ', text)
+        if ',' in text:
+            text = _COMMA_SPACING_RE.sub(', ', text)
         
         return text
     
@@ -219,21 +492,17 @@ Italian translation:"""
         """Final polish for natural Italian flow"""
         
         # Apply sleep-specific vocabulary improvements
-        for eng, ita in self.sleep_vocabulary.items():
-            # Use word boundaries to avoid partial matches
-            pattern = r'\b' + re.escape(eng) + r'\b'
-            text = re.sub(pattern, ita, text, flags=re.IGNORECASE)
+        text = _replace_sleep_vocabulary(text)
         
         # Italian-specific punctuation adjustments
-        text = re.sub(r'\s+\.', '.', text)  # Remove space before periods
-        text = re.sub(r'\s+,', ',', text)   # Remove space before commas
-        text = re.sub(r'\s+;', ';', text)   # Remove space before semicolons
+        text = _SPACE_BEFORE_PUNCT_RE.sub(r'\1', text)  # Remove space before periods, commas and semicolons
         
         # Ensure proper capitalization after periods
-        text = re.sub(r'\. +([a-z])', lambda m: '. ' + m.group(1).upper(), text)
+        if '. ' in text:
+            text = _SENTENCE_START_RE.sub(lambda m: '. ' + m.group(1).upper(), text)
         
         # Clean up multiple spaces
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
     
@@ -242,27 +511,7 @@ Italian translation:"""
         
         logger.warning("Using emergency translation - quality will be reduced")
         
-        # Basic word replacement for critical sleep story terms
-        emergency_dict = {
-            'you': 'tu',
-            'your': 'il tuo',
-            'the': 'il',
-            'and': 'e',
-            'are': 'sei',
-            'is': 'è',
-            'water': 'acqua',
-            'light': 'luce',
-            'wind': 'vento',
-            'tree': 'albero',
-            'sky': 'cielo',
-            'sun': 'sole',
-            'moon': 'luna'
-        }
-        
-        for eng, ita in emergency_dict.items():
-            text = re.sub(r'\b' + eng + r'\b', ita, text, flags=re.IGNORECASE)
-        
-        return text
+        return _replace_emergency_words(text)
     
     def estimate_translation_time(self, text_length: int) -> float:
         """Estimate translation time in seconds"""
@@ -4,8 +4,11 @@ from contextlib import asynccontextmanager
 import logging
 import os
 
+import httpx
+
 from app.api import api_router
 from app.core.config import settings
+from app.core.translation_system import translation_cache
 
 # Setup simple logging (no structlog for now)
 logging.basicConfig(level=logging.INFO)
@@ -16,21 +19,27 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Backend starting - version 1.0.0")
     logger.info(f"Ollama URL: {settings.OLLAMA_URL}")
+    logger.info(f"Ollama parallel requests: {settings.OLLAMA_NUM_PARALLEL} (keep equal to the server's OLLAMA_NUM_PARALLEL; "
+                f"set OLLAMA_MAX_LOADED_MODELS there to bound resident models)")
     logger.info(f"Data path: {settings.DATA_PATH}")
     
     # Create data directories in volume
     try:
-        os.makedirs(settings.OUTPUTS_PATH, exist_ok=True)
-        os.makedirs(settings.LOGS_PATH, exist_ok=True)
-        os.makedirs(settings.TEMPLATES_PATH, exist_ok=True)
+        for path in (settings.OUTPUTS_PATH, settings.LOGS_PATH, settings.TEMPLATES_PATH):
+            os.makedirs(path, exist_ok=True)
         logger.info("Data directories created")
     except Exception as e:
         logger.error(f"Failed to create directories: {e}")
     
+    if settings.TRANSLATION_CACHE_PATH:
+        translation_cache.load(settings.TRANSLATION_CACHE_PATH)
+    
+    # Shared async HTTP client for the app's own probes; keeps its connections pooled
+    app.state.http = httpx.AsyncClient(timeout=5.0)
+    
     # Check Ollama connection
     try:
-        import requests
-        response = requests.get(f"{settings.OLLAMA_URL}/api/tags", timeout=5)
+        response = await app.state.http.get(f"{settings.OLLAMA_URL}/api/tags")
         if response.status_code == 200:
             models = response.json().get('models', [])
             model_names = [m['name'] for m in models]
@@ -49,6 +58,9 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    if settings.TRANSLATION_CACHE_PATH:
+        translation_cache.save(settings.TRANSLATION_CACHE_PATH)
+    await app.state.http.aclose()
     logger.info("Backend shutting down")
 
 # Create FastAPI app
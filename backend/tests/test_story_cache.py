@@ -0,0 +1,31 @@
+import os
+
+os.environ.setdefault("SEMANTIC_CACHE_PATH", "")
+
+from app.core.story_cache import ThemeOutlineCache
+from app.core.story_generator import StoryGenerator
+
+DESCRIPTION = ("A slow, quiet journey along a winding path, with soft sounds, cool air, "
+               "gentle light and plenty of pauses to breathe before settling somewhere safe to sleep.")
+
+
+def _key(gen, theme, description=DESCRIPTION):
+    return gen._theme_cache_key(theme, description)
+
+
+def test_different_themes_never_share_an_entry():
+    gen = StoryGenerator()
+    cache = ThemeOutlineCache(threshold=0.5, semantic=True)
+    cache.put("theme", *_key(gen, "Forest walk at dawn"), {"setting": "forest"})
+
+    assert cache.get("theme", *_key(gen, "Beach walk at night")) is None
+    assert cache.get("theme", *_key(gen, "Forest walk at dusk")) is None
+
+
+def test_same_theme_matches_normalized_and_similar_description():
+    gen = StoryGenerator()
+    cache = ThemeOutlineCache(threshold=0.9, semantic=True)
+    cache.put("theme", *_key(gen, "Forest walk at dawn"), {"setting": "forest"})
+
+    assert cache.get("theme", *_key(gen, "  forest WALK at dawn. ")) == {"setting": "forest"}
+    assert cache.get("theme", *_key(gen, "Forest walk at dawn", DESCRIPTION + " Please")) == {"setting": "forest"}
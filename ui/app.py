@@ -1,18 +1,44 @@
 import os
 import json
 import time
+import asyncio
+import functools
+import threading
+import httpx
 import requests
+from concurrent.futures import ThreadPoolExecutor
 import gradio as gr
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, NamedTuple
 
 API_URL = os.getenv("API_URL", "http://backend:8000/api")
 
 # ----------------------
 # HTTP helpers
 # ----------------------
+# Pooled keep-alive connections shared by every handler, instead of a new
+# TCP connection per call
+_session = requests.Session()
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=20))
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=20))
+
+_aclient: Optional[httpx.AsyncClient] = None
+
+def get_aclient() -> httpx.AsyncClient:
+    """Shared async client for SSE streams; created lazily on Gradio's event loop."""
+    global _aclient
+    if _aclient is None:
+        _aclient = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=20, max_connections=40))
+    return _aclient
+
+# Bounded pool for the blocking session calls made from async handlers
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ui-io")
+
+async def run_blocking(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_io_pool, fn, *args)
+
 def get_json(path: str, timeout: int = 6) -> Optional[Dict[str, Any]]:
     try:
-        r = requests.get(f"{API_URL}{path}", timeout=timeout)
+        r = _session.get(f"{API_URL}{path}", timeout=timeout)
         if r.status_code == 200:
             return r.json()
     except Exception:
@@ -21,7 +47,7 @@ def get_json(path: str, timeout: int = 6) -> Optional[Dict[str, Any]]:
 
 def post_json(path: str, payload: Dict[str, Any], timeout: int = 30) -> Optional[Dict[str, Any]]:
     try:
-        r = requests.post(f"{API_URL}{path}", json=payload, timeout=timeout)
+        r = _session.post(f"{API_URL}{path}", json=payload, timeout=timeout)
         if r.status_code == 200:
             return r.json()
     except Exception:
@@ -31,14 +57,36 @@ def post_json(path: str, payload: Dict[str, Any], timeout: int = 30) -> Optional
 # ----------------------
 # Data loaders
 # ----------------------
+def ttl_cache(seconds: float):
+    """Memoize a loader for `seconds`, keyed on its args; concurrent callers share one fetch."""
+    def deco(fn):
+        cache: Dict[tuple, tuple] = {}
+        lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            with lock:
+                hit = cache.get(args)
+                if hit and time.monotonic() - hit[0] < seconds:
+                    return hit[1]
+                value = fn(*args)
+                if value:  # an empty answer usually means the backend is still starting
+                    cache[args] = (time.monotonic(), value)
+                return value
+        return wrapper
+    return deco
+
+@ttl_cache(30)
 def load_ollama_models() -> List[str]:
     data = get_json("/models/ollama", timeout=6) or []
     return sorted([m.get("name") for m in data if isinstance(m, dict) and m.get("name")])
 
+@ttl_cache(30)
 def load_presets() -> Dict[str, Dict[str, Any]]:
     data = get_json("/models/presets", timeout=6) or {}
     return data.get("presets", {})
 
+@ttl_cache(2)
 def load_jobs_labels() -> List[str]:
     data = get_json("/jobs", timeout=3) or {"jobs": []}
     labels = []
@@ -293,22 +341,42 @@ def render_status_html(ev: Dict[str, Any]) -> str:
     return html
 
 # ----------------------
-# SSE streaming (requests.iter_lines)
+# SSE streaming (httpx async)
 # ----------------------
-def stream_sse(job_id: str):
+class StreamOutput(NamedTuple):
+    """One update for the streaming outputs, in the order they are wired in the UI."""
+    status: str
+    story: str = ""
+    metrics: str = ""
+    schema: str = ""
+
+# Telemetry can arrive much faster than anyone reads it: re-render at most
+# this often, always keeping the newest frame
+MIN_RENDER_INTERVAL = 0.15
+
+def _frame_key(data: Dict[str, Any]) -> tuple:
+    beat = data.get("beat", {}) or {}
+    return (data.get("status"), data.get("progress"), data.get("current_step"),
+            beat.get("index"), beat.get("stage"), beat.get("stage_progress"))
+
+async def stream_sse(job_id: str):
     url = f"{API_URL}/generate/{job_id}/stream"
     max_retries = 4
     retry = 0
-    last_progress = -1.0
+    last_key = None
+    last_render = 0.0
+    pending = None
+    partial_story = ""
 
     while retry <= max_retries:
         try:
-            with requests.get(url, headers={"Accept": "text/event-stream", "Cache-Control": "no-cache", "Connection": "keep-alive"}, stream=True, timeout=(10, 90)) as resp:
+            async with get_aclient().stream("GET", url, headers={"Accept": "text/event-stream", "Cache-Control": "no-cache"}, timeout=httpx.Timeout(90, connect=10)) as resp:
                 if resp.status_code != 200:
-                    yield (f"<div style='color:#dc2626'>❌ Stream HTTP {resp.status_code}</div>", "", "", "")
+                    yield StreamOutput(f"<div style='color:#dc2626'>❌ Stream HTTP {resp.status_code}</div>")
                     return
                 retry = 0
-                for line in resp.iter_lines(decode_unicode=True):
+                partial_story = ""  # a fresh connection replays every draft beat
+                async for line in resp.aiter_lines():
                     if not line:
                         continue
                     if line.startswith("data: "):
@@ -318,40 +386,52 @@ def stream_sse(job_id: str):
                             continue
 
                         status = data.get("status", "processing")
-                        progress = float(data.get("progress", 0))
-
-                        if abs(progress - last_progress) >= 0.5 or status in ("completed", "failed"):
-                            yield (render_status_html(data), "", "", "")
-                            last_progress = progress
+                        delta = data.get("story_delta")
+                        if delta:
+                            partial_story = f"{partial_story}\n\n{delta}" if partial_story else delta
+                        key = _frame_key(data)
+                        if key != last_key or delta:
+                            pending = data
+                            last_key = key
+
+                        terminal = status in ("completed", "failed")
+                        if pending is not None and not terminal and time.monotonic() - last_render >= MIN_RENDER_INTERVAL:
+                            yield StreamOutput(render_status_html(pending), partial_story)
+                            pending = None
+                            last_render = time.monotonic()
 
                         if status == "completed":
-                            res = get_json(f"/generate/{job_id}/result", timeout=10) or {}
+                            res = data.get("result") or await run_blocking(get_json, f"/generate/{job_id}/result", 10) or {}
                             story = res.get("story_text", "")
                             metrics = json.dumps(res.get("metrics", {}), indent=2)
                             schema = json.dumps(res.get("beats_schema", {}), indent=2) if res.get("beats_schema") else "(no schema)"
-                            yield (render_status_html(data), story, metrics, schema)
+                            yield StreamOutput(render_status_html(data), story, metrics, schema)
                             return
                         if status == "failed":
-                            yield (render_status_html(data), "", "", "")
+                            yield StreamOutput(render_status_html(data), partial_story)
                             return
 
                     elif line.startswith("event: heartbeat"):
-                        continue
+                        # Quiet backend: flush whatever the interval held back
+                        if pending is not None:
+                            yield StreamOutput(render_status_html(pending), partial_story)
+                            pending = None
+                            last_render = time.monotonic()
 
             break
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             retry += 1
             if retry > max_retries:
-                yield (f"<div style='color:#dc2626'>❌ Stream failed: {str(e)}</div>", "", "", "")
+                yield StreamOutput(f"<div style='color:#dc2626'>❌ Stream failed: {str(e)}</div>")
                 return
-            yield (f"<div style='color:#f59e0b'>⚠️ Stream lost, retrying ({retry}/{max_retries})...</div>", "", "", "")
-            time.sleep(min(2 ** retry, 8))
+            yield StreamOutput(f"<div style='color:#f59e0b'>⚠️ Stream lost, retrying ({retry}/{max_retries})...</div>", partial_story)
+            await asyncio.sleep(min(2 ** retry, 8))
 
 # ----------------------
 # Actions
 # ----------------------
-def start_and_stream(theme, description, duration,
+async def start_and_stream(theme, description, duration,
                      use_reasoner, use_polish,
                      tts_markers, strict_schema,
                      sensory_rotation, sleep_taper, rotation,
@@ -405,39 +485,39 @@ def start_and_stream(theme, description, duration,
         retry_delay, fallback_model
     )
 
-    started = post_json("/generate/story", payload)
+    started = await run_blocking(post_json, "/generate/story", payload)
     if not started or "job_id" not in started:
-        yield ("<div style='color:#dc2626'>❌ Failed to start generation</div>", "", "", "")
+        yield StreamOutput("<div style='color:#dc2626'>❌ Failed to start generation</div>")
         return
 
     jid = started["job_id"]
-    yield (f"<div style='color:#0ea5e9'>🚀 Generation started — Job ID: <code>{jid}</code></div>", "", "", "")
+    yield StreamOutput(f"<div style='color:#0ea5e9'>🚀 Generation started — Job ID: <code>{jid}</code></div>")
 
-    for update in stream_sse(jid):
+    async for update in stream_sse(jid):
         yield update
 
-def attach_and_stream(job_label: str):
+async def attach_and_stream(job_label: str):
     jid = parse_job_id(job_label)
     if not jid:
-        yield ("<div style='color:#dc2626'>❌ Select a job</div>", "", "", "")
+        yield StreamOutput("<div style='color:#dc2626'>❌ Select a job</div>")
         return
 
-    tel = get_json(f"/generate/{jid}/telemetry", timeout=4)
+    tel = await run_blocking(get_json, f"/generate/{jid}/telemetry", 4)
     if tel:
-        yield (render_status_html(tel), "", "", "")
+        yield StreamOutput(render_status_html(tel))
 
-    for update in stream_sse(jid):
+    async for update in stream_sse(jid):
         yield update
 
-def attach_manual(manual_id: str):
+async def attach_manual(manual_id: str):
     jid = (manual_id or "").strip()
     if not jid:
-        yield ("<div style='color:#dc2626'>❌ Enter a Job ID</div>", "", "", "")
+        yield StreamOutput("<div style='color:#dc2626'>❌ Enter a Job ID</div>")
         return
-    tel = get_json(f"/generate/{jid}/telemetry", timeout=4)
+    tel = await run_blocking(get_json, f"/generate/{jid}/telemetry", 4)
     if tel:
-        yield (render_status_html(tel), "", "", "")
-    for update in stream_sse(jid):
+        yield StreamOutput(render_status_html(tel))
+    async for update in stream_sse(jid):
         yield update
 
 # ----------------------
@@ -464,7 +544,7 @@ with gr.Blocks(title="Sleep Stories — UI", theme=gr.themes.Soft()) as demo:
 
             def on_preset_change(preset_key, presets):
                 if not preset_key or not presets or preset_key not in presets:
-                    return [gr.update()]*8
+                    return [gr.update()]*3
                 p = presets[preset_key]
                 return [
                     gr.update(value=p.get("generator")),
@@ -509,6 +589,8 @@ with gr.Blocks(title="Sleep Stories — UI", theme=gr.themes.Soft()) as demo:
                 jobs_dd = gr.Dropdown(choices=[], label="Active/Recent Jobs", allow_custom_value=False)
                 refresh_jobs = gr.Button("↻")
                 attach_btn = gr.Button("🔗 Attach")
+            auto_refresh = gr.Checkbox(label="Auto-refresh jobs (10s)", value=True)
+            jobs_timer = gr.Timer(10, active=True)
             with gr.Row():
                 manual_id = gr.Textbox(label="Manual Job ID", placeholder="Enter job ID…")
                 attach_manual_btn = gr.Button("🔗 Attach manual")
@@ -557,11 +639,13 @@ with gr.Blocks(title="Sleep Stories — UI", theme=gr.themes.Soft()) as demo:
                 with gr.Tab("Schema"):
                     schema = gr.Textbox(lines=12, show_copy_button=True)
 
+    stream_outputs = [status, story, metrics, schema]
+    assert len(stream_outputs) == len(StreamOutput._fields)
+
     # Load presets/models/jobs on app load
-    def init_load():
-        models = load_ollama_models()
-        presets = load_presets()
-        jobs = load_jobs_labels()
+    async def init_load():
+        models, presets, jobs = await asyncio.gather(
+            run_blocking(load_ollama_models), run_blocking(load_presets), run_blocking(load_jobs_labels))
         return (models, presets,
                 gr.update(choices=models), gr.update(choices=models), gr.update(choices=models),
                 gr.update(choices=list(presets.keys())),
@@ -575,9 +659,21 @@ with gr.Blocks(title="Sleep Stories — UI", theme=gr.themes.Soft()) as demo:
 
     refresh_jobs.click(refresh_jobs_only, None, [jobs_dd])
 
-    run_btn = gr.Button("🎬 Generate", variant="primary")
+    def auto_refresh_jobs(selected):
+        # Keep the selected job across ticks even though its label (progress %) changes
+        labels = load_jobs_labels()
+        jid = parse_job_id(selected)
+        value = next((l for l in labels if parse_job_id(l) == jid), None) if jid else None
+        return gr.update(choices=labels, value=value)
+
+    jobs_timer.tick(auto_refresh_jobs, inputs=[jobs_dd], outputs=[jobs_dd], show_progress="hidden")
+    auto_refresh.change(lambda on: gr.Timer(active=on), inputs=[auto_refresh], outputs=[jobs_timer])
 
-    run_btn.click(
+    with gr.Row():
+        run_btn = gr.Button("🎬 Generate", variant="primary")
+        stop_btn = gr.Button("⏹️ Stop streaming")
+
+    run_evt = run_btn.click(
         start_and_stream,
         inputs=[
             # Base
@@ -609,12 +705,16 @@ with gr.Blocks(title="Sleep Stories — UI", theme=gr.themes.Soft()) as demo:
             # Performance
             max_concurrent_models, model_unload_delay, max_retries, retry_delay, fallback_model
         ],
-        outputs=[status, story, metrics, schema],
+        outputs=stream_outputs,
         concurrency_id="generate", concurrency_limit=1
     )
 
-    attach_btn.click(attach_and_stream, inputs=[jobs_dd], outputs=[status, story, metrics, schema])
-    attach_manual_btn.click(attach_manual, inputs=[manual_id], outputs=[status, story, metrics, schema])
+    attach_evt = attach_btn.click(attach_and_stream, inputs=[jobs_dd], outputs=stream_outputs)
+    attach_manual_evt = attach_manual_btn.click(attach_manual, inputs=[manual_id], outputs=stream_outputs)
+
+    # Detaches this tab's stream only; the backend job keeps running and can be re-attached
+    stop_btn.click(lambda: StreamOutput("<div style='color:#f59e0b'>⏹️ Stream detached</div>"),
+                   None, stream_outputs, cancels=[run_evt, attach_evt, attach_manual_evt])
 
 if __name__ == "__main__":
     demo.queue().launch(server_name="0.0.0.0", server_port=7860, show_error=True)
\ No newline at end of file